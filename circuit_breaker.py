@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Circuit breakers do Liferay API Collector
+Disjuntores por endpoint e por host, com sondagem half-open, e um orçamento
+global de falhas: fontes quebradas falham rápido em vez de travar a coleta
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class CircuitOpenError(RuntimeError):
+    """Requisição recusada sem ir à rede (circuito aberto ou orçamento esgotado)"""
+
+    def __init__(self, message: str, retry_after: float = 0.0, budget_exhausted: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.budget_exhausted = budget_exhausted
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Disjuntor de uma fonte.
+
+    Após `failure_threshold` falhas seguidas o circuito abre e as
+    requisições são recusadas sem ir à rede. Passados `reset_timeout`
+    segundos, uma única requisição de sondagem é liberada (half-open): se
+    der certo o circuito fecha, se falhar volta a abrir com o dobro do
+    tempo (até `max_reset_timeout`).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60,
+                 max_reset_timeout: float = 900):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.total_failures = 0
+        self.times_opened = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.last_error = None
+
+    def retry_after(self) -> float:
+        """Segundos até a próxima sondagem (0 se já liberada)"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                return False
+            self.state = HALF_OPEN
+            self.probing = False
+        # Half-open: apenas uma sondagem por vez
+        if self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.probing = False
+        self.reset_timeout = self.base_reset_timeout
+
+    def record_failure(self, error: str) -> bool:
+        """Registra uma falha; retorna True se o circuito acabou de abrir"""
+        self.failures += 1
+        self.total_failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN:
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+            return self._open()
+        if self.state == CLOSED and self.failures >= self.failure_threshold:
+            return self._open()
+        return False
+
+    def _open(self) -> bool:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probing = False
+        self.times_opened += 1
+        return True
+
+    def to_dict(self) -> Dict:
+        return {
+            'estado': self.state,
+            'falhas': self.total_failures,
+            'aberturas': self.times_opened,
+            'ultimo_erro': self.last_error
+        }
+
+
+class CircuitBreakerRegistry:
+    """
+    Disjuntores por endpoint (URL sem parâmetros, ou a `key` explícita de
+    quem chama - ex.: o modelo `/user-accounts/{id}` para todas as entidades
+    de um tipo) e por host.
+
+    Só fontes que já falharam ganham um disjuntor. Falhas de rede, timeouts
+    e respostas 5xx/429 contam também para o host; erros 4xx dizem respeito
+    apenas ao endpoint. Esgotado o orçamento global de falhas
+    (`failure_budget` requisições que falharam), todas as requisições são
+    recusadas até o fim da execução (ou até `reset_budget`).
+    """
+
+    def __init__(self, failure_threshold: int = 5, host_failure_threshold: int = 15,
+                 reset_timeout: float = 60, failure_budget: Optional[int] = None):
+        self.failure_threshold = failure_threshold
+        self.host_failure_threshold = host_failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_budget = failure_budget
+        self.endpoints: Dict[str, CircuitBreaker] = {}
+        self.hosts: Dict[str, CircuitBreaker] = {}
+        self.failed_requests = 0
+        self.rejected = 0
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint_key(url: str, key: Optional[str] = None) -> str:
+        return key or url.split('?', 1)[0]
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        return urlparse(url).netloc
+
+    @property
+    def budget_exhausted(self) -> bool:
+        return self.failure_budget is not None and self.failed_requests >= self.failure_budget
+
+    def allow(self, url: str, key: Optional[str] = None) -> bool:
+        """True se a requisição pode ir à rede"""
+        with self._lock:
+            host = self.hosts.get(self.host_key(url))
+            endpoint = self.endpoints.get(self.endpoint_key(url, key))
+            allowed = not self.budget_exhausted and (host is None or host.allow())
+            if allowed and endpoint is not None and not endpoint.allow():
+                allowed = False
+                if host is not None and host.state == HALF_OPEN:
+                    host.probing = False  # sondagem do host não foi usada
+            if not allowed:
+                self.rejected += 1
+            return allowed
+
+    def retry_after(self, url: str, key: Optional[str] = None) -> float:
+        """Segundos até o endpoint (e o host) aceitarem uma sondagem"""
+        with self._lock:
+            breakers = (self.hosts.get(self.host_key(url)), self.endpoints.get(self.endpoint_key(url, key)))
+            return max((breaker.retry_after() for breaker in breakers if breaker), default=0.0)
+
+    def record_success(self, url: str, key: Optional[str] = None):
+        with self._lock:
+            for breaker in (self.hosts.get(self.host_key(url)), self.endpoints.get(self.endpoint_key(url, key))):
+                if breaker is not None:
+                    breaker.record_success()
+
+    def record_failure(self, url: str, error: str, host_failure: bool, key: Optional[str] = None):
+        """Registra uma tentativa que falhou (host_failure: rede, timeout, 5xx ou 429)"""
+        with self._lock:
+            key = self.endpoint_key(url, key)
+            endpoint = self.endpoints.setdefault(
+                key, CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            )
+            if endpoint.record_failure(error):
+                self.logger.warning(f"🔌 Circuito aberto para {key} por {endpoint.reset_timeout:.0f}s "
+                                    f"({endpoint.failures} falhas seguidas: {error})")
+            host_key = self.host_key(url)
+            if host_failure:
+                host = self.hosts.setdefault(
+                    host_key, CircuitBreaker(self.host_failure_threshold, self.reset_timeout)
+                )
+                if host.record_failure(error):
+                    self.logger.error(f"🔌 Circuito aberto para o host {host_key} por {host.reset_timeout:.0f}s")
+            elif host_key in self.hosts:
+                # O host respondeu (ex.: 404/401) - está no ar, mesmo que o endpoint não
+                self.hosts[host_key].record_success()
+
+    def record_failed_request(self):
+        """Conta uma requisição que falhou após as tentativas no orçamento global"""
+        with self._lock:
+            self.failed_requests += 1
+            if self.failure_budget is not None and self.failed_requests == self.failure_budget:
+                self.logger.error(f"💥 Orçamento de {self.failure_budget} falhas esgotado - "
+                                  f"demais requisições serão recusadas")
+
+    def reset_budget(self):
+        """Zera o orçamento de falhas (ex.: a cada ciclo do modo watch)"""
+        with self._lock:
+            self.failed_requests = 0
+
+    def report(self) -> Dict:
+        """Resumo para o relatório da coleta"""
+        return {
+            'requisicoes_com_falha': self.failed_requests,
+            'requisicoes_recusadas': self.rejected,
+            'orcamento_de_falhas': self.failure_budget,
+            'orcamento_esgotado': self.budget_exhausted,
+            'hosts': {key: breaker.to_dict() for key, breaker in self.hosts.items()},
+            'endpoints': {key: breaker.to_dict() for key, breaker in self.endpoints.items()}
+        }
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Leitura com acesso aleatório das coleções do Liferay API Collector
+Índice lateral (.idx) com id → faixa de bytes; os registros são lidos via mmap
+e decodificados somente quando acessados
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+INDEX_SUFFIX = '.idx'
+INDEX_MAGIC = b'LFIDX2\x00\x00'
+
+# Cabeçalho: magic, quantidade de registros e assinatura do arquivo de dados
+# (tamanho, mtime em ns, inode) - qualquer regravação invalida o índice
+_HEADER = struct.Struct('<8sQQqQ')
+# Entrada (ordem do arquivo): hash do id, offset, tamanho, pasta, criação, modificação
+_ENTRY = struct.Struct('<QQIqqq')
+# Permutação das entradas ordenada pelo hash do id (busca binária)
+_ORDER = struct.Struct('<I')
+
+# Valor gravado quando o registro não tem pasta/data
+MISSING = -(2 ** 63)
+
+# Campos que identificam a pasta de um registro, na ordem de preferência
+FOLDER_FIELDS = (
+    'documentFolderId',
+    'structuredContentFolderId',
+    'parentDocumentFolderId',
+    'parentStructuredContentFolderId',
+)
+
+_READ_CHUNK = 64 * 1024
+
+
+def index_path(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+
+def data_signature(path: str) -> Tuple[int, int, int]:
+    """Tamanho, mtime (ns) e inode do arquivo de dados, gravados no índice"""
+    info = os.stat(path)
+    return info.st_size, info.st_mtime_ns, info.st_ino
+
+
+def key_hash(record_id) -> int:
+    """Hash de 64 bits do id (ids numéricos e uuids usam o mesmo espaço)"""
+    digest = hashlib.blake2b(str(record_id).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def _record_key(record: Dict):
+    value = record.get('id')
+    return value if value is not None else record.get('uuid')
+
+
+def _folder_id(record: Dict) -> int:
+    for field in FOLDER_FIELDS:
+        value = record.get(field)
+        if isinstance(value, int):
+            return value
+    source_folder = record.get('source_folder')
+    if isinstance(source_folder, dict) and isinstance(source_folder.get('id'), int):
+        return source_folder['id']
+    return MISSING
+
+
+def parse_timestamp(value: Union[str, datetime, None]) -> int:
+    """Data ISO 8601 (ou datetime) em segundos desde a época"""
+    if value is None:
+        return MISSING
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return MISSING
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+class RecordIndexBuilder:
+    """Acumula as entradas do índice enquanto a coleção é gravada"""
+
+    def __init__(self):
+        self.entries: List[Tuple] = []
+
+    def add(self, record: Dict, offset: int, length: int):
+        key = _record_key(record)
+        if key is None:
+            return
+        self.entries.append((
+            key_hash(key), offset, length, _folder_id(record),
+            parse_timestamp(record.get('dateCreated')), parse_timestamp(record.get('dateModified'))
+        ))
+
+    def write(self, path: str, data_path: str):
+        """Grava de forma atômica em `path` o índice do arquivo `data_path` (já gravado)"""
+        order = sorted(range(len(self.entries)), key=lambda i: self.entries[i][0])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(INDEX_MAGIC, len(self.entries), *data_signature(data_path)))
+            for entry in self.entries:
+                f.write(_ENTRY.pack(*entry))
+            for position in order:
+                f.write(_ORDER.pack(position))
+        os.replace(tmp_path, path)
+
+
+def _scan_records(path: str) -> Iterator[Tuple[int, int, Dict]]:
+    """Percorre uma lista JSON não comprimida retornando (offset, tamanho, registro)"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(_READ_CHUNK)
+        start = buffer.find('[')
+        if start < 0:
+            raise ValueError(f"{path} não contém uma lista JSON")
+        base_bytes = 0  # offset em bytes de buffer[0]
+        cursor, cursor_bytes = 0, 0
+        pos = start + 1
+        eof = False
+
+        def byte_offset(i: int) -> int:
+            nonlocal cursor, cursor_bytes
+            cursor_bytes += len(buffer[cursor:i].encode('utf-8'))
+            cursor = i
+            return base_bytes + cursor_bytes
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer):
+                if buffer[pos] == ']':
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    offset = byte_offset(pos)
+                    yield offset, byte_offset(end) - offset, record
+                    pos = end
+                    continue
+            elif eof:
+                raise ValueError(f"{path} terminou antes do fim da lista")
+            chunk = f.read(_READ_CHUNK)
+            eof = not chunk
+            base_bytes = byte_offset(pos)
+            buffer = buffer[pos:] + chunk
+            pos, cursor, cursor_bytes = 0, 0, 0
+
+
+def build_index(path: str) -> str:
+    """Gera o índice de uma coleção já existente (ex.: saídas antigas)"""
+    builder = RecordIndexBuilder()
+    for offset, length, record in _scan_records(path):
+        builder.add(record, offset, length)
+    idx = index_path(path)
+    builder.write(idx, path)
+    return idx
+
+
+class CollectionReader:
+    """
+    Acesso aleatório a uma coleção JSON não comprimida.
+
+    Dados e índice são mapeados com mmap: abrir o leitor não depende do
+    tamanho da coleção e cada registro só é decodificado quando acessado.
+    Se o índice não existir (ou estiver desatualizado) ele é gerado.
+
+        with CollectionReader('liferay_data/all_documents.json') as docs:
+            doc = docs.get(1030798)
+            recentes = list(docs.iter(folder_id=177805, modified_after='2025-01-01'))
+    """
+
+    def __init__(self, path: str, build_missing_index: bool = True):
+        self.path = path
+        self._data_file = open(path, 'rb')
+        info = os.fstat(self._data_file.fileno())
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ) if info.st_size else b''
+
+        idx = index_path(path)
+        if not self._index_is_current(idx, (info.st_size, info.st_mtime_ns, info.st_ino)):
+            if not build_missing_index:
+                raise FileNotFoundError(f"Índice ausente ou desatualizado: {idx}")
+            build_index(path)
+
+        self._index_file = open(idx, 'rb')
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        _, self.count, _, _, _ = _HEADER.unpack_from(self._index, 0)
+        self._entries_start = _HEADER.size
+        self._order_start = self._entries_start + self.count * _ENTRY.size
+
+    @staticmethod
+    def _index_is_current(idx: str, signature: Tuple[int, int, int]) -> bool:
+        try:
+            with open(idx, 'rb') as f:
+                magic, _, *indexed_signature = _HEADER.unpack(f.read(_HEADER.size))
+        except (OSError, struct.error):
+            return False
+        return magic == INDEX_MAGIC and tuple(indexed_signature) == signature
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._index.close()
+        self._data_file.close()
+        self._index_file.close()
+
+    def _entry(self, position: int) -> Tuple:
+        return _ENTRY.unpack_from(self._index, self._entries_start + position * _ENTRY.size)
+
+    def _decode(self, entry: Tuple) -> Dict:
+        _, offset, length, _, _, _ = entry
+        return json.loads(self._data[offset:offset + length])
+
+    def _ordered(self, i: int) -> Tuple:
+        (position,) = _ORDER.unpack_from(self._index, self._order_start + i * _ORDER.size)
+        return self._entry(position)
+
+    def get(self, record_id) -> Optional[Dict]:
+        """Busca um registro pelo id (ou uuid) - O(log n), sem carregar a coleção"""
+        target = key_hash(record_id)
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._ordered(mid)[0] < target:
+                low = mid + 1
+            else:
+                high = mid
+
+        # Colisões de hash: conferir o id de cada candidato
+        while low < self.count:
+            entry = self._ordered(low)
+            if entry[0] != target:
+                break
+            record = self._decode(entry)
+            if str(_record_key(record)) == str(record_id):
+                return record
+            low += 1
+        return None
+
+    def __contains__(self, record_id) -> bool:
+        return self.get(record_id) is not None
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.iter()
+
+    def iter(self, folder_id: Optional[int] = None,
+             modified_after: Union[str, datetime, None] = None,
+             modified_before: Union[str, datetime, None] = None,
+             created_after: Union[str, datetime, None] = None,
+             created_before: Union[str, datetime, None] = None) -> Iterator[Dict]:
+        """
+        Itera os registros na ordem do arquivo, filtrando pelo índice.
+
+        Apenas os registros que passam nos filtros são decodificados.
+        Limites `*_after` são inclusivos e `*_before` exclusivos.
+        """
+        bounds = [
+            (4, parse_timestamp(created_after), parse_timestamp(created_before)),
+            (5, parse_timestamp(modified_after), parse_timestamp(modified_before)),
+        ]
+        bounds = [(field, low, high) for field, low, high in bounds if low != MISSING or high != MISSING]
+
+        for position in range(self.count):
+            entry = self._entry(position)
+            if folder_id is not None and entry[3] != folder_id:
+                continue
+            if any(
+                entry[field] == MISSING
+                or (low != MISSING and entry[field] < low)
+                or (high != MISSING and entry[field] >= high)
+                for field, low, high in bounds
+            ):
+                continue
+            yield self._decode(entry)
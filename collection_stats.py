@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Estatísticas em streaming do Liferay API Collector
+Agregados calculados página a página durante a coleta (contadores e
+acumuladores compactos, sem guardar listas de registros)
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+
+class RunningNumber:
+    """Soma, mínimo, máximo e média de uma série numérica"""
+
+    __slots__ = ('count', 'total', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def to_dict(self) -> Dict:
+        return {
+            'quantidade': self.count,
+            'total': self.total,
+            'minimo': self.minimum,
+            'maximo': self.maximum,
+            'media': round(self.total / self.count, 2) if self.count else None
+        }
+
+
+class CollectionStats:
+    """Agregados dos registros de uma coleção"""
+
+    def __init__(self):
+        self.records = 0
+        self.created_by_month = Counter()
+        self.modified_by_month = Counter()
+        self.first_created = None
+        self.last_modified = None
+        self.file_extensions = Counter()
+        self.encoding_formats = Counter()
+        self.size_in_bytes = RunningNumber()
+        self.bytes_by_folder = Counter()
+        self.records_by_folder = Counter()
+
+    def add(self, record: Dict):
+        self.records += 1
+
+        created = record.get('dateCreated')
+        if isinstance(created, str):
+            self.created_by_month[created[:7]] += 1
+            if self.first_created is None or created < self.first_created:
+                self.first_created = created
+
+        modified = record.get('dateModified')
+        if isinstance(modified, str):
+            self.modified_by_month[modified[:7]] += 1
+            if self.last_modified is None or modified > self.last_modified:
+                self.last_modified = modified
+
+        if 'fileExtension' in record:
+            self.file_extensions[(record.get('fileExtension') or '').lower() or '(sem extensão)'] += 1
+        if 'encodingFormat' in record:
+            self.encoding_formats[record.get('encodingFormat') or '(desconhecido)'] += 1
+
+        size = record.get('sizeInBytes')
+        folder_id = record.get('documentFolderId', record.get('structuredContentFolderId'))
+        if isinstance(size, (int, float)):
+            self.size_in_bytes.add(size)
+            if folder_id is not None:
+                self.bytes_by_folder[str(folder_id)] += size
+        if folder_id is not None:
+            self.records_by_folder[str(folder_id)] += 1
+
+    def to_dict(self) -> Dict:
+        summary = {
+            'registros': self.records,
+            'primeira_criacao': self.first_created,
+            'ultima_modificacao': self.last_modified,
+            'criados_por_mes': dict(sorted(self.created_by_month.items())),
+            'modificados_por_mes': dict(sorted(self.modified_by_month.items())),
+        }
+        if self.records_by_folder:
+            summary['registros_por_pasta'] = dict(self.records_by_folder.most_common())
+        if self.file_extensions:
+            summary['extensoes'] = dict(self.file_extensions.most_common())
+        if self.encoding_formats:
+            summary['formatos'] = dict(self.encoding_formats.most_common())
+        if self.size_in_bytes.count:
+            summary['tamanho_em_bytes'] = self.size_in_bytes.to_dict()
+            summary['bytes_por_pasta'] = dict(self.bytes_by_folder.most_common())
+        return summary
+
+
+class EndpointStats:
+    """Vazão de um endpoint: páginas, itens, bytes e tempo de requisição"""
+
+    __slots__ = ('pages', 'items', 'bytes', 'seconds')
+
+    def __init__(self):
+        self.pages = 0
+        self.items = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'paginas': self.pages,
+            'itens': self.items,
+            'bytes': self.bytes,
+            'segundos_em_requisicao': round(self.seconds, 3),
+            'itens_por_segundo': round(self.items / self.seconds, 2) if self.seconds else None,
+            'bytes_por_segundo': round(self.bytes / self.seconds) if self.seconds else None
+        }
+
+
+class StreamingStats:
+    """Perfil da coleta alimentado a cada página recebida"""
+
+    def __init__(self):
+        self.collections: Dict[str, CollectionStats] = {}
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    def observe_page(self, endpoint: str, items: int, response_bytes: int, seconds: float):
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        stats.pages += 1
+        stats.items += items
+        stats.bytes += response_bytes
+        stats.seconds += seconds
+
+    def observe_records(self, collection: Optional[str], records: Iterable[Dict]):
+        if not collection:
+            return
+        stats = self.collections.get(collection)
+        if stats is None:
+            stats = self.collections[collection] = CollectionStats()
+        for record in records:
+            stats.add(record)
+
+    def to_dict(self) -> Dict:
+        total = EndpointStats()
+        for stats in self.endpoints.values():
+            total.pages += stats.pages
+            total.items += stats.items
+            total.bytes += stats.bytes
+            total.seconds += stats.seconds
+        return {
+            'colecoes': {name: stats.to_dict() for name, stats in self.collections.items()},
+            'endpoints': {name: stats.to_dict() for name, stats in self.endpoints.items()},
+            'total': total.to_dict()
+        }
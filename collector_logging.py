@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Logging do Liferay API Collector
+Handlers em thread de fundo (QueueHandler/QueueListener), saída JSON estruturada
+e amostragem de logs por página
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Atributos padrão de LogRecord - o restante vem de `extra=` e vira campo do JSON
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON com os campos extras"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: str = "INFO", log_file: Optional[str] = "liferay_collector.log",
+                  json_format: bool = True) -> logging.handlers.QueueListener:
+    """
+    Configura o logger raiz para enfileirar registros sem bloquear.
+
+    A escrita em arquivo/stderr é feita por um QueueListener em thread
+    separada, encerrado automaticamente na saída do processo.
+    """
+    global _listener
+    shutdown_logging()
+
+    handlers = []
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    handlers.append(console)
+
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding='utf-8', delay=True)
+        if json_format:
+            file_handler.setFormatter(JsonFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Esvazia a fila e para a thread de logging"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+class PageLogSampler:
+    """
+    Agrega os eventos de página por endpoint.
+
+    Em vez de uma linha INFO por página, emite um resumo de progresso a cada
+    `every` páginas (páginas, itens, latência média/máxima) e um resumo final
+    em `finish()`. Cada página continua disponível em nível DEBUG.
+    """
+
+    def __init__(self, logger: logging.Logger, every: int = 25):
+        self.logger = logger
+        self.every = max(1, every)
+        self.endpoints: Dict[str, Dict] = {}
+
+    def _state(self, endpoint: str) -> Dict:
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = {
+                'pages': 0, 'items': 0, 'latency_total': 0.0, 'latency_max': 0.0,
+                'window_pages': 0, 'window_items': 0, 'window_latency': 0.0,
+                'started': time.monotonic()
+            }
+        return self.endpoints[endpoint]
+
+    def record_page(self, endpoint: str, page: int, total_pages: Optional[int], items: int,
+                    latency: float = 0.0):
+        state = self._state(endpoint)
+        state['pages'] += 1
+        state['items'] += items
+        state['latency_total'] += latency
+        state['latency_max'] = max(state['latency_max'], latency)
+        state['window_pages'] += 1
+        state['window_items'] += items
+        state['window_latency'] += latency
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                f"📄 Página {page}/{total_pages}: {items} itens coletados",
+                extra={'event': 'page', 'endpoint': endpoint, 'page': page,
+                       'total_pages': total_pages, 'items': items,
+                       'latency_ms': round(latency * 1000, 1)}
+            )
+
+        if state['window_pages'] >= self.every:
+            self._emit_progress(endpoint, page, total_pages)
+
+    def _emit_progress(self, endpoint: str, page: int, total_pages: Optional[int]):
+        state = self._state(endpoint)
+        if not state['window_pages']:
+            return
+        avg_latency = state['window_latency'] / state['window_pages']
+        self.logger.info(
+            f"📄 Página {page}/{total_pages}: +{state['window_items']} itens "
+            f"em {state['window_pages']} páginas (latência média {avg_latency * 1000:.0f} ms)",
+            extra={'event': 'progress', 'endpoint': endpoint, 'page': page,
+                   'total_pages': total_pages, 'pages_in_window': state['window_pages'],
+                   'items': state['window_items'], 'latency_ms': round(avg_latency * 1000, 1)}
+        )
+        state['window_pages'] = 0
+        state['window_items'] = 0
+        state['window_latency'] = 0.0
+
+    def finish(self, endpoint: str) -> Dict:
+        """Emite o resumo final do endpoint e retorna os agregados"""
+        state = self._state(endpoint)
+        pages = state['pages']
+        summary = {
+            'pages': pages,
+            'items': state['items'],
+            'latency_avg_ms': round(state['latency_total'] / pages * 1000, 1) if pages else 0.0,
+            'latency_max_ms': round(state['latency_max'] * 1000, 1),
+            'elapsed_s': round(time.monotonic() - state['started'], 2)
+        }
+        self.logger.info(
+            f"📊 {endpoint}: {pages} páginas, {summary['items']} itens, "
+            f"latência média {summary['latency_avg_ms']:.0f} ms",
+            extra={'event': 'endpoint_summary', 'endpoint': endpoint, **summary}
+        )
+        del self.endpoints[endpoint]
+        return summary
@@ -25,9 +25,25 @@ PASSWORD = "Senha aqui"
 # Token CSRF (opcional - será obtido automaticamente após login)
 CSRF_TOKEN = None  # Deixe None para obter automaticamente
 
+# Arquivo de respostas brutas (permite reprocessar com --offline sem rede)
+# None = não arquivar; caminho relativo é criado dentro de OUTPUT_DIR
+ARCHIVE_DIR = None  # ex.: "archive"
+
+# Cache de sessão autenticada (reaproveitado entre execuções e processos)
+# None = desabilita o cache e refaz o login a cada execução
+SESSION_CACHE_FILE = ".liferay_session.json"
+SESSION_CACHE_TTL = 1800  # segundos - validade de sessões baseadas em cookies
+
 # Diretório onde serão salvos os dados
 OUTPUT_DIR = "liferay_data"
 
+# Formato das coleções salvas
+# None = JSON sem compressão; "gzip" ou "zstd" (requer pip install zstandard)
+OUTPUT_COMPRESSION = None
+OUTPUT_COMPRESSION_LEVEL = None  # None = padrão (gzip 6, zstd 3)
+OUTPUT_PRETTY = True  # False = JSON compacto, um registro por linha
+OUTPUT_INDEX = True  # Gera <arquivo>.json.idx para leitura aleatória (só sem compressão)
+
 # ========================================
 # CONFIGURAÇÕES DE SEGURANÇA SSL
 # ========================================
@@ -46,6 +62,12 @@ REQUEST_TIMEOUT = 30  # segundos
 MAX_RETRIES = 3
 RATE_LIMIT_DELAY = 0.5  # segundos entre requisições
 
+# Circuit breakers - fontes quebradas falham rápido em vez de repetir tentativas
+BREAKER_FAILURE_THRESHOLD = 5  # falhas seguidas para abrir o circuito de um endpoint
+BREAKER_HOST_FAILURE_THRESHOLD = 15  # falhas de rede/5xx seguidas para abrir o circuito do host
+BREAKER_RESET_TIMEOUT = 60  # segundos até a sondagem half-open (dobra a cada nova falha)
+FAILURE_BUDGET = 50  # requisições com falha antes de abortar a coleta (None = sem limite)
+
 # Tamanhos de página para cada endpoint
 PAGE_SIZES = {
     'structured_contents': 20,
@@ -55,10 +77,29 @@ PAGE_SIZES = {
     'documents': 20
 }
 
+# Coleta distribuída (--queue)
+QUEUE_WORKERS = 4  # processos worker locais
+QUEUE_LEASE_SECONDS = 120  # tarefa volta para a fila se o worker não confirmar nesse tempo
+QUEUE_JOURNAL_MODE = "DELETE"  # "WAL" é mais rápido, mas só se todos os workers estiverem no mesmo host
+
+# Entidades referenciadas (--resolve-references)
+RESOLVE_REFERENCES = False
+REFERENCE_CACHE_FILE = ".liferay_references.json"  # cache LRU persistente entre execuções
+REFERENCE_CACHE_SIZE = 10000  # máximo de entidades no cache
+REFERENCE_CACHE_TTL = 86400  # segundos até uma entidade em cache ser buscada de novo
+REFERENCE_WORKERS = 4  # requisições concorrentes
+
+# Modo watch (--watch) - intervalo de cada fonte se adapta às alterações
+WATCH_MIN_INTERVAL = 120  # segundos
+WATCH_MAX_INTERVAL = 86400  # segundos
+WATCH_BACKOFF = 1.5  # multiplicador do intervalo quando nada mudou
+
 # Configurações de log
 LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR
 LOG_TO_FILE = True
 LOG_FILE = "liferay_collector.log"
+LOG_FORMAT = "json"  # json = uma linha JSON por evento no arquivo; text = formato legível
+LOG_PROGRESS_EVERY = 25  # resumo de progresso a cada N páginas (detalhe por página em DEBUG)
 
 # ========================================
 # CONFIGURAÇÕES ESPECÍFICAS DE COLETA
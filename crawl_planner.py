@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Planejador de coleta do Liferay API Collector
+Estima requisições, bytes e tempo de cada coleta a partir da execução anterior,
+sem nenhum acesso à rede
+"""
+
+import json
+import math
+import os
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from output_writers import find_output_file, iter_records, load_collection
+
+
+# Arquivo de saída e chave do summary_report.json de cada coleta
+COLLECTION_SOURCES = {
+    'structured_contents': ('structured_contents.json', 'conteudos_estruturados'),
+    'content_folders': ('content_folders.json', 'pastas_de_conteudo'),
+    'site_pages': ('site_pages.json', 'paginas_do_site'),
+    'document_folders': ('document_folders.json', 'pastas_de_documentos'),
+    'documents': ('all_documents.json', 'documentos'),
+}
+
+# Requisições extras por página quando o CSRF não é obtido (ver find_csrf_token)
+CSRF_PROBE_REQUESTS = 4
+
+# Valores usados quando não há execução anterior
+DEFAULT_BYTES_PER_RECORD = 2500
+DEFAULT_REQUEST_LATENCY = 1.0  # segundos
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Converte 'H:MM:SS.ffffff' (str(timedelta)) em segundos"""
+    try:
+        hours, minutes, seconds = value.split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except (AttributeError, ValueError):
+        return None
+
+
+class CrawlPlanner:
+    """Monta um plano de coleta com base no estado deixado em output_dir"""
+
+    def __init__(self, output_dir: str, page_sizes: Dict[str, int], rate_limit_delay: float = 0.5,
+                 concurrency: int = 1):
+        self.output_dir = output_dir
+        self.page_sizes = page_sizes
+        self.rate_limit_delay = rate_limit_delay
+        self.concurrency = max(1, concurrency)
+        self.summary = self._load_json('summary_report.json') or {}
+        self.manifest = self._load_manifest()
+
+    def _load_json(self, filename: str):
+        path = find_output_file(self.output_dir, filename)
+        if not path:
+            return None
+        try:
+            if path.endswith('.json'):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            return load_collection(path)
+        except (OSError, ValueError):
+            return None
+
+    def _file_size(self, filename: str) -> int:
+        path = find_output_file(self.output_dir, filename)
+        return os.path.getsize(path) if path else 0
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(os.path.join(self.output_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+                return json.load(f).get('entidades', {})
+        except (OSError, ValueError):
+            return {}
+
+    def summary_count(self, collection: str) -> Optional[int]:
+        """Registros coletados na última execução (0 também para coletas não selecionadas)"""
+        _, summary_key = COLLECTION_SOURCES[collection]
+        return self.summary.get('estatisticas', {}).get(summary_key)
+
+    def previous_count(self, collection: str) -> Tuple[Optional[int], str]:
+        """
+        Registros conhecidos de uma coleta e de onde vieram.
+
+        O summary_report.json registra 0 para coletas não selecionadas na
+        última execução; nesse caso valem as contagens do manifest.json
+        (que herda os tipos de coletas anteriores) ou do arquivo de saída.
+        """
+        count = self.summary_count(collection)
+        if count:
+            return count, 'summary_report.json'
+        if collection in self.manifest:
+            return len(self.manifest[collection]), 'manifest.json'
+        filename, _ = COLLECTION_SOURCES[collection]
+        path = find_output_file(self.output_dir, filename)
+        if path:
+            try:
+                return sum(1 for _ in iter_records(path)), filename
+            except (OSError, ValueError):
+                pass
+        return None, 'desconhecido'
+
+    def folder_document_counts(self) -> List[int]:
+        """numberOfDocuments de cada pasta de documentos da última coleta"""
+        folders = self._load_json('document_folders.json') or []
+        return [folder.get('numberOfDocuments', 0) for folder in folders]
+
+    def page_count(self, collection: str, count: int) -> int:
+        page_size = self.page_sizes.get(collection, 20)
+        return max(1, math.ceil(count / page_size))
+
+    def estimate_pages(self, collection: str) -> Dict:
+        """Páginas e registros esperados para uma coleta"""
+        if collection == 'documents':
+            folder_counts = self.folder_document_counts()
+            if folder_counts:
+                return {
+                    'records': sum(folder_counts),
+                    'pages': sum(self.page_count(collection, n) for n in folder_counts),
+                    'source': 'document_folders.json'
+                }
+
+        count, source = self.previous_count(collection)
+        if count is None:
+            return {'records': None, 'pages': 1, 'source': source}
+        return {'records': count, 'pages': self.page_count(collection, count), 'source': source}
+
+    def bytes_per_record(self, collection: str, records: Optional[int]) -> int:
+        filename, _ = COLLECTION_SOURCES[collection]
+        size = self._file_size(filename)
+        if size and records:
+            return max(1, size // records)
+        return DEFAULT_BYTES_PER_RECORD
+
+    def requests_per_page(self) -> int:
+        csrf_obtained = self.summary.get('configuracao', {}).get('csrf_token_obtido', True)
+        return 1 if csrf_obtained else 1 + CSRF_PROBE_REQUESTS
+
+    def request_latency(self) -> float:
+        """
+        Latência média por requisição HTTP observada na execução anterior.
+
+        Só contam as coletas feitas naquela execução; execuções offline
+        (sem rede) não servem de base.
+        """
+        if self.summary.get('configuracao', {}).get('modo_offline'):
+            return DEFAULT_REQUEST_LATENCY
+        duration = _parse_duration(self.summary.get('duracao_total'))
+        if not duration:
+            return DEFAULT_REQUEST_LATENCY
+
+        pages = sum(
+            self.estimate_pages(collection)['pages']
+            for collection in COLLECTION_SOURCES
+            if self.summary_count(collection)
+        )
+        if not pages:
+            return DEFAULT_REQUEST_LATENCY
+
+        network_time = duration - pages * self.rate_limit_delay
+        return max(network_time / (pages * self.requests_per_page()), 0.01)
+
+    def build_plan(self, collect_options: Dict[str, bool]) -> Dict:
+        """Estima requisições, bytes e tempo para as coletas selecionadas"""
+        latency = self.request_latency()
+        requests_per_page = self.requests_per_page()
+        collections = {}
+
+        for collection, selected in collect_options.items():
+            if not selected or collection not in COLLECTION_SOURCES:
+                continue
+
+            estimate = self.estimate_pages(collection)
+            pages = estimate['pages']
+            records = estimate['records']
+            requests_count = pages * requests_per_page
+            seconds = pages * (requests_per_page * latency + self.rate_limit_delay)
+
+            collections[collection] = {
+                'registros': records,
+                'paginas': pages,
+                'requisicoes': requests_count,
+                'bytes_estimados': (records or 0) * self.bytes_per_record(collection, records),
+                'segundos_sequencial': round(seconds, 1),
+                'origem': estimate['source']
+            }
+
+        total_seconds = sum(c['segundos_sequencial'] for c in collections.values())
+        return {
+            'latencia_por_requisicao': round(latency, 3),
+            'requisicoes_por_pagina': requests_per_page,
+            'concorrencia': self.concurrency,
+            'coletas': collections,
+            'total': {
+                'requisicoes': sum(c['requisicoes'] for c in collections.values()),
+                'bytes_estimados': sum(c['bytes_estimados'] for c in collections.values()),
+                'segundos_sequencial': round(total_seconds, 1),
+                'segundos_estimados': round(total_seconds / self.concurrency, 1)
+            }
+        }
+
+    @staticmethod
+    def format_plan(plan: Dict) -> str:
+        """Formata o plano como tabela legível"""
+        lines = [
+            f"{'Coleta':<22}{'Registros':>10}{'Páginas':>9}{'Requisições':>13}{'MB':>9}{'Tempo':>12}",
+            "-" * 75
+        ]
+        for name, c in plan['coletas'].items():
+            records = c['registros'] if c['registros'] is not None else '?'
+            lines.append(
+                f"{name:<22}{records:>10}{c['paginas']:>9}{c['requisicoes']:>13}"
+                f"{c['bytes_estimados'] / 1_000_000:>9.2f}"
+                f"{str(timedelta(seconds=int(c['segundos_sequencial']))):>12}"
+            )
+        total = plan['total']
+        lines.append("-" * 75)
+        lines.append(
+            f"{'TOTAL':<41}{total['requisicoes']:>13}{total['bytes_estimados'] / 1_000_000:>9.2f}"
+            f"{str(timedelta(seconds=int(total['segundos_sequencial']))):>12}"
+        )
+        lines.append(
+            f"Latência estimada: {plan['latencia_por_requisicao']}s/requisição, "
+            f"{plan['requisicoes_por_pagina']} requisição(ões)/página"
+        )
+        lines.append(
+            f"Tempo com concorrência {plan['concorrencia']}: "
+            f"{timedelta(seconds=int(total['segundos_estimados']))}"
+        )
+        return "\n".join(lines)
@@ -9,6 +9,7 @@ import json
 import os
 import time
 import base64
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional
 import logging
@@ -16,12 +17,50 @@ import re
 from urllib.parse import urlparse, urljoin
 import urllib3
 
+from circuit_breaker import CircuitBreakerRegistry
+from collection_stats import StreamingStats
+from collector_logging import PageLogSampler, setup_logging
+from output_writers import OutputWriter
+from phase_profiler import PhaseProfiler
+from reference_resolver import EntityCache, ReferenceResolver
+from response_archive import ArchiveReplay, ResponseArchive
+from run_manifest import RunManifest, record_id, rotate_and_diff
+from session_cache import SessionCache
+
 # Desabilitar warnings de SSL não verificado
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 class LiferayAPICollector:
+    # Caminho (relativo ao site) de cada coleção paginada
+    COLLECTION_PATHS = {
+        'structured_contents': 'structured-contents',
+        'content_folders': 'structured-content-folders',
+        'site_pages': 'site-pages',
+        'document_folders': 'document-folders',
+    }
+    
+    # Intervalo mínimo entre reautenticações por 401 de uma sessão já confirmada (segundos)
+    REAUTH_MIN_INTERVAL = 60
+    
+    COLLECTION_SAVED_MESSAGES = {
+        'structured_contents': "💾 Salvos {count} conteúdos estruturados em {filename}",
+        'content_folders': "💾 Salvas {count} pastas de conteúdo em {filename}",
+        'site_pages': "💾 Salvas {count} páginas do site em {filename}",
+        'document_folders': "💾 Salvas {count} pastas de documentos em {filename}",
+    }
+    
     def __init__(self, base_url: str, site_id: str, username: str = None, password: str = None, 
-                 csrf_token: str = None, output_dir: str = "liferay_data", verify_ssl: bool = False):
+                 csrf_token: str = None, output_dir: str = "liferay_data", verify_ssl: bool = False,
+                 session_cache_file: Optional[str] = ".liferay_session.json", session_ttl: int = 1800,
+                 log_progress_every: int = 25, output_compression: Optional[str] = None,
+                 compression_level: Optional[int] = None, pretty_output: bool = True,
+                 output_index: bool = True, archive_dir: Optional[str] = None,
+                 offline_archive: Optional[str] = None, resolve_references: bool = False,
+                 reference_cache_file: Optional[str] = None, reference_cache_size: int = 10000,
+                 reference_cache_ttl: int = 86400, reference_workers: int = 4,
+                 breaker_threshold: int = 5, host_breaker_threshold: int = 15,
+                 breaker_reset_timeout: float = 60, failure_budget: Optional[int] = None,
+                 profile: bool = False):
         self.base_url = base_url.rstrip('/')
         self.site_id = site_id
         self.username = username
@@ -29,8 +68,21 @@ class LiferayAPICollector:
         self.csrf_token = csrf_token
         self.output_dir = output_dir
         self.verify_ssl = verify_ssl  # Nova opção para SSL
+        self.output_writer = OutputWriter(output_dir, compression=output_compression,
+                                          level=compression_level, pretty=pretty_output,
+                                          index=output_index)
         self.session = requests.Session()
         
+        # Estado de autenticação (persistido no cache de sessão)
+        self.auth_strategy = None
+        self.oauth2_token = None
+        self.session_expires_at = None
+        self.session_restored = False
+        self.session_verified = False
+        self.last_reauth_at = 0.0
+        self.session_cache = SessionCache(session_cache_file, ttl=session_ttl) if session_cache_file else None
+        self.session_cache_key = SessionCache.make_key(self.base_url, username)
+        
         # Configurar verificação SSL
         self.session.verify = self.verify_ssl
         
@@ -46,29 +98,46 @@ class LiferayAPICollector:
             'Sec-Fetch-Site': 'same-origin'
         })
         
-        # Configurar logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('liferay_collector.log'),
-                logging.StreamHandler()
-            ]
-        )
+        # Logging é configurado por quem usa o coletor (ver collector_logging.setup_logging)
         self.logger = logging.getLogger(__name__)
+        self.page_sampler = PageLogSampler(self.logger, every=log_progress_every)
+        self.csrf_warning_logged = False
+        self.manifest = RunManifest()
         
-        # Log sobre SSL
-        if not self.verify_ssl:
-            self.logger.info("🔓 Verificação SSL desabilitada - conexões inseguras permitidas")
-        else:
-            self.logger.info("🔒 Verificação SSL habilitada")
+        # Arquivo de respostas brutas e modo offline (respostas lidas do arquivo)
+        self.archive = ResponseArchive(archive_dir) if archive_dir else None
+        self.replay = ArchiveReplay(offline_archive) if offline_archive else None
         
-        # Criar diretório de saída
-        os.makedirs(output_dir, exist_ok=True)
+        # Estado compartilhado entre threads (ex.: ReferenceResolver): latência e
+        # bytes da última resposta são por thread; login, CSRF e contadores sob lock
+        self._request_state = threading.local()
+        self.auth_lock = threading.RLock()
+        self.stats_lock = threading.Lock()
         
-        # Autenticar se credenciais foram fornecidas
-        if username and password:
-            self.authenticate_comprehensive()
+        # Perfil dos dados (histogramas, linhas do tempo e vazão por endpoint)
+        self.data_profile = StreamingStats()
+        
+        # Perfil de CPU/memória por fase (--profile)
+        self.profiler = PhaseProfiler(os.path.join(output_dir, 'profile'), enabled=profile)
+        
+        # Circuit breakers por endpoint/host e orçamento global de falhas
+        self.circuit_breakers = CircuitBreakerRegistry(
+            failure_threshold=breaker_threshold, host_failure_threshold=host_breaker_threshold,
+            reset_timeout=breaker_reset_timeout, failure_budget=failure_budget
+        )
+        self.failed_sources: Dict[str, Dict] = {}
+        
+        # Referências (autor, categorias, conteúdos relacionados) resolvidas ao final
+        self.reference_resolver = ReferenceResolver(
+            self,
+            EntityCache(reference_cache_file, max_entries=reference_cache_size, ttl=reference_cache_ttl,
+                        namespace=self.base_url),
+            workers=reference_workers
+        ) if resolve_references else None
+        
+        # Diretório de saída e autenticação são preparados sob demanda
+        # (ver _output_path e ensure_authenticated) - construção sem rede
+        self.authenticated = False
         
         # Estatísticas
         self.stats = {
@@ -78,6 +147,7 @@ class LiferayAPICollector:
             'document_folders': 0,
             'documents': 0,
             'errors': 0,
+            'rejected_requests': 0,
             'start_time': datetime.now()
         }
 
@@ -88,31 +158,197 @@ class LiferayAPICollector:
         if response.status_code != 200:
             self.logger.debug(f"Response text: {response.text[:500]}...")
 
-    def authenticate_comprehensive(self):
+    @property
+    def last_request_latency(self) -> float:
+        """Latência da última requisição feita pela thread atual"""
+        return getattr(self._request_state, 'latency', 0.0)
+
+    @last_request_latency.setter
+    def last_request_latency(self, value: float):
+        self._request_state.latency = value
+
+    @property
+    def last_request_rejected(self) -> bool:
+        """True se a última requisição da thread foi recusada pelo circuit breaker"""
+        return getattr(self._request_state, 'rejected', False)
+
+    @property
+    def last_response_bytes(self) -> int:
+        """Tamanho da última resposta recebida pela thread atual"""
+        return getattr(self._request_state, 'response_bytes', 0)
+
+    @last_response_bytes.setter
+    def last_response_bytes(self, value: int):
+        self._request_state.response_bytes = value
+
+    def ensure_authenticated(self):
+        """Autentica na primeira requisição se credenciais foram fornecidas"""
+        with self.auth_lock:
+            if self.authenticated:
+                return
+            self.authenticated = True
+            
+            # Log sobre SSL
+            if not self.verify_ssl:
+                self.logger.info("🔓 Verificação SSL desabilitada - conexões inseguras permitidas")
+            else:
+                self.logger.info("🔒 Verificação SSL habilitada")
+            
+            if self.username and self.password:
+                self.authenticate_comprehensive()
+
+    def _output_path(self, filename: str) -> str:
+        """Caminho dentro de output_dir, criando o diretório na primeira escrita"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, filename)
+
+    def save_collection(self, filename: str, records: List[Dict]) -> str:
+        """Grava uma coleção no formato de saída configurado (compressão/compacto)"""
+        return self.output_writer.write_collection(filename, records)
+
+    def authenticate_comprehensive(self, force: bool = False):
         """Autenticação abrangente com múltiplas estratégias"""
+        # Reaproveitar sessão de execuções anteriores
+        if not force and self.restore_cached_session():
+            return
+        
         self.logger.info("🔐 Iniciando autenticação abrangente...")
+        self.session_restored = False
         
         # Estratégia 1: Basic Auth
         if self.try_basic_auth():
             self.logger.info("✅ Autenticação Basic Auth funcionou")
-            return
+            self.auth_strategy = 'basic'
         
         # Estratégia 2: Login via formulário web
-        if self.try_web_login():
+        elif self.try_web_login():
             self.logger.info("✅ Autenticação via login web funcionou")
-            return
+            self.auth_strategy = 'web_login'
             
         # Estratégia 3: Login via API JSON-WS
-        if self.try_jsonws_login():
+        elif self.try_jsonws_login():
             self.logger.info("✅ Autenticação via JSON-WS funcionou")
-            return
+            self.auth_strategy = 'jsonws'
         
         # Estratégia 4: OAuth2 (se disponível)
-        if self.try_oauth2():
+        elif self.try_oauth2():
             self.logger.info("✅ Autenticação OAuth2 funcionou")
+            self.auth_strategy = 'oauth2'
+        
+        else:
+            self.auth_strategy = None
+            self.logger.warning("⚠️ Nenhuma estratégia de autenticação funcionou - tentando sem autenticação")
+            return
+        
+        self.session_verified = True
+        self.save_session_cache()
+
+    def _basic_auth_header(self) -> str:
+        auth_string = f"{self.username}:{self.password}"
+        auth_b64 = base64.b64encode(auth_string.encode('ascii')).decode('ascii')
+        return f'Basic {auth_b64}'
+
+    def restore_cached_session(self) -> bool:
+        """Restaura a sessão salva em disco sem nenhuma requisição de login"""
+        if not self.session_cache:
+            return False
+        
+        entry = self.session_cache.load(self.session_cache_key)
+        if not entry:
+            return False
+        
+        strategy = entry.get('strategy')
+        self.auth_strategy = strategy
+        self.session_expires_at = entry.get('expires_at')
+        
+        if strategy == 'basic':
+            self.session.headers['Authorization'] = self._basic_auth_header()
+        elif strategy in ('web_login', 'jsonws'):
+            SessionCache.restore_cookies(self.session.cookies, entry.get('cookies'))
+        elif strategy == 'oauth2':
+            self.oauth2_token = entry.get('oauth2')
+            if SessionCache.is_expired(self.oauth2_token):
+                if not self.refresh_oauth2_token():
+                    self.auth_strategy = None
+                    return False
+            else:
+                self.session.headers['Authorization'] = f"Bearer {self.oauth2_token['access_token']}"
+        else:
+            return False
+        
+        if not self.csrf_token and entry.get('csrf_token'):
+            self.csrf_token = entry['csrf_token']
+        
+        self.session_restored = True
+        self.session_verified = False
+        self.logger.info(f"♻️ Sessão restaurada do cache (estratégia: {strategy})")
+        return True
+
+    def save_session_cache(self):
+        """Persiste a estratégia vencedora, cookies, CSRF e token OAuth2"""
+        if not self.session_cache or not self.auth_strategy:
             return
         
-        self.logger.warning("⚠️ Nenhuma estratégia de autenticação funcionou - tentando sem autenticação")
+        entry = {
+            'strategy': self.auth_strategy,
+            'csrf_token': self.csrf_token
+        }
+        if self.auth_strategy in ('web_login', 'jsonws'):
+            entry['cookies'] = SessionCache.serialize_cookies(self.session.cookies)
+        if self.auth_strategy == 'oauth2' and self.oauth2_token:
+            entry['oauth2'] = self.oauth2_token
+        
+        try:
+            self.session_cache.save(self.session_cache_key, entry)
+            self.session_expires_at = self.session_cache.load(self.session_cache_key).get('expires_at')
+        except Exception as e:
+            self.logger.debug(f"Falha ao salvar cache de sessão: {e}")
+
+    def ensure_valid_session(self):
+        """Renova o token OAuth2 antes de expirar"""
+        if self.auth_strategy == 'oauth2' and self.oauth2_token and SessionCache.is_expired(self.oauth2_token):
+            if not self.refresh_oauth2_token():
+                self.authenticate_comprehensive(force=True)
+
+    def handle_auth_failure(self, status_code: int = 401) -> bool:
+        """
+        Reautentica somente se a sessão em uso estiver de fato inválida.
+        Retorna True se uma nova sessão foi obtida (vale repetir a requisição)
+        """
+        if not (self.username and self.password):
+            return False
+        
+        # Sessão vinda do cache e ainda não confirmada - descartar e refazer login
+        if self.session_restored and not self.session_verified:
+            self.logger.info("🔄 Sessão em cache recusada - reautenticando...")
+            return self._relogin()
+        
+        # Token OAuth2 expirado - tentar refresh primeiro
+        if self.auth_strategy == 'oauth2' and self.oauth2_token and SessionCache.is_expired(self.oauth2_token):
+            if self.refresh_oauth2_token():
+                return True
+        
+        if self.session_expires_at and time.time() >= self.session_expires_at:
+            self.logger.info("🔄 Sessão expirada - reautenticando...")
+            return self._relogin()
+        
+        # 401 em sessão já confirmada: o portal invalidou a sessão antes do TTL
+        # (reinício, logout). 403 é falta de permissão e não justifica novo login.
+        if status_code == 401 and time.time() - self.last_reauth_at >= self.REAUTH_MIN_INTERVAL:
+            self.logger.info("🔄 Sessão recusada pelo servidor (401) - reautenticando...")
+            return self._relogin()
+        return False
+
+    def _relogin(self) -> bool:
+        """Descarta a sessão atual (e a entrada do cache) e refaz o login"""
+        self.last_reauth_at = time.time()
+        if self.session_cache:
+            self.session_cache.invalidate(self.session_cache_key)
+        self.session.headers.pop('Authorization', None)
+        self.session.cookies.clear()
+        self.session_verified = False
+        self.authenticate_comprehensive(force=True)
+        return self.auth_strategy is not None
 
     def try_basic_auth(self):
         """Tenta autenticação Basic Auth"""
@@ -120,11 +356,7 @@ class LiferayAPICollector:
             self.logger.info("🔑 Tentando Basic Auth...")
             
             # Configurar Basic Auth
-            auth_string = f"{self.username}:{self.password}"
-            auth_bytes = auth_string.encode('ascii')
-            auth_b64 = base64.b64encode(auth_bytes).decode('ascii')
-            
-            self.session.headers['Authorization'] = f'Basic {auth_b64}'
+            self.session.headers['Authorization'] = self._basic_auth_header()
             
             # Testar com endpoint simples
             test_url = f"{self.base_url}/api/jsonws/user/get-current-user"
@@ -269,7 +501,7 @@ class LiferayAPICollector:
                 access_token = token_data.get('access_token')
                 
                 if access_token:
-                    self.session.headers['Authorization'] = f'Bearer {access_token}'
+                    self._store_oauth2_token(token_data)
                     self.logger.info("✅ OAuth2 sucesso")
                     return True
                     
@@ -278,6 +510,44 @@ class LiferayAPICollector:
         
         return False
 
+    def _store_oauth2_token(self, token_data: Dict):
+        """Guarda o token OAuth2 com expiração absoluta"""
+        previous = self.oauth2_token or {}
+        self.oauth2_token = {
+            'access_token': token_data['access_token'],
+            'refresh_token': token_data.get('refresh_token') or previous.get('refresh_token'),
+            'expires_at': time.time() + int(token_data.get('expires_in', 600))
+        }
+        self.session.headers['Authorization'] = f"Bearer {self.oauth2_token['access_token']}"
+
+    def refresh_oauth2_token(self) -> bool:
+        """Renova o token OAuth2 usando o refresh_token"""
+        refresh_token = (self.oauth2_token or {}).get('refresh_token')
+        if not refresh_token:
+            return False
+        
+        try:
+            self.logger.info("🔁 Renovando token OAuth2...")
+            oauth_url = f"{self.base_url}/o/oauth2/token"
+            oauth_data = {
+                'grant_type': 'refresh_token',
+                'refresh_token': refresh_token,
+                'client_id': 'headless-server',
+            }
+            
+            response = self.session.post(oauth_url, data=oauth_data, verify=self.verify_ssl)
+            
+            if response.status_code == 200 and response.json().get('access_token'):
+                self._store_oauth2_token(response.json())
+                self.auth_strategy = 'oauth2'
+                self.save_session_cache()
+                return True
+                
+        except Exception as e:
+            self.logger.debug(f"Refresh OAuth2 falhou: {e}")
+        
+        return False
+
     def find_csrf_token(self):
         """Busca token CSRF em várias fontes"""
         csrf_sources = [
@@ -297,6 +567,7 @@ class LiferayAPICollector:
                         self.csrf_token = csrf_header
                         self.session.headers['X-CSRF-Token'] = csrf_header
                         self.logger.info(f"✅ CSRF token encontrado no header: {csrf_header[:10]}...")
+                        self.save_session_cache()
                         return
                     
                     # Buscar no conteúdo
@@ -305,22 +576,55 @@ class LiferayAPICollector:
                         self.csrf_token = csrf_matches[0]
                         self.session.headers['X-CSRF-Token'] = self.csrf_token
                         self.logger.info(f"✅ CSRF token extraído do conteúdo: {self.csrf_token[:10]}...")
+                        self.save_session_cache()
                         return
                         
             except Exception as e:
                 self.logger.debug(f"Erro ao buscar CSRF em {url}: {e}")
         
-        self.logger.warning("⚠️ CSRF token não encontrado em nenhuma fonte")
+        # Avisar uma única vez - a busca se repete a cada requisição
+        if not self.csrf_warning_logged:
+            self.logger.warning("⚠️ CSRF token não encontrado em nenhuma fonte")
+            self.csrf_warning_logged = True
+        else:
+            self.logger.debug("CSRF token não encontrado em nenhuma fonte")
 
-    def make_request(self, url: str, params: Dict = None, max_retries: int = 3) -> Optional[Dict]:
-        """Faz requisição HTTP com retry e debugging melhorado"""
+    def make_request(self, url: str, params: Dict = None, max_retries: int = 3,
+                     breaker_key: Optional[str] = None) -> Optional[Dict]:
+        """
+        Faz requisição HTTP com retry, circuit breaker e debugging melhorado.
+        `breaker_key` agrupa URLs de um mesmo endpoint (ex.: uma por entidade) num só disjuntor
+        """
+        
+        self._request_state.rejected = False
         
-        # Tentar encontrar CSRF token se não tiver
+        # Modo offline - nenhuma requisição de rede
+        if self.replay is not None:
+            self.last_request_latency = 0.0
+            data, self.last_response_bytes = self.replay.fetch(url, params)
+            return data
+        
+        self.ensure_authenticated()
+        
+        # Tentar encontrar CSRF token se não tiver (uma thread por vez)
         if not self.csrf_token:
-            self.find_csrf_token()
+            with self.auth_lock:
+                if not self.csrf_token:
+                    self.find_csrf_token()
         
         for attempt in range(max_retries):
+            # Fonte com circuito aberto (ou orçamento de falhas esgotado) - falhar rápido
+            if not self.circuit_breakers.allow(url, key=breaker_key):
+                self.logger.debug(f"⏭️ Requisição recusada pelo circuit breaker: {url}")
+                self._request_state.rejected = True
+                with self.stats_lock:
+                    self.stats['rejected_requests'] += 1
+                return None
+            
             try:
+                with self.auth_lock:
+                    self.ensure_valid_session()
+                
                 # Headers específicos para API Headless
                 api_headers = {
                     'Accept': 'application/json',
@@ -331,8 +635,15 @@ class LiferayAPICollector:
                 if self.csrf_token:
                     api_headers['X-CSRF-Token'] = self.csrf_token
                 
+                request_start = time.perf_counter()
                 response = self.session.get(url, params=params, headers=api_headers, 
                                           timeout=30, verify=self.verify_ssl)
+                self.last_request_latency = time.perf_counter() - request_start
+                self.last_response_bytes = len(response.content)
+                
+                if self.archive is not None:
+                    self.archive.record(url, params, response, self.last_request_latency,
+                                        request_headers={**self.session.headers, **api_headers})
                 
                 # Debug detalhado no primeiro erro
                 if response.status_code != 200 and attempt == 0:
@@ -344,44 +655,71 @@ class LiferayAPICollector:
                     self.logger.debug(f"🔍 DEBUG - Response preview: {response.text[:200]}...")
                 
                 response.raise_for_status()
+                self.session_verified = True
+                self.circuit_breakers.record_success(url, key=breaker_key)
                 return response.json()
             
             except requests.exceptions.SSLError as e:
                 self.logger.error(f"❌ Erro SSL: {e}")
                 if self.verify_ssl:
                     self.logger.warning("💡 Dica: Tente executar com verify_ssl=False se estiver usando certificado auto-assinado")
+                self.circuit_breakers.record_failure(url, f"SSL: {e}", host_failure=True, key=breaker_key)
+                self.count_failed_request()
                 return None
             
             except requests.exceptions.HTTPError as e:
+                status = response.status_code
+                self.circuit_breakers.record_failure(url, f"HTTP {status}",
+                                                     host_failure=status >= 500 or status == 429, key=breaker_key)
+                reauthenticated = False
+                
                 if response.status_code == 403:
                     self.logger.warning(f"❌ Acesso negado (403) para {url}")
                     if attempt == 0:
-                        self.logger.info("🔄 Tentando reautenticar...")
-                        if self.username and self.password:
-                            self.authenticate_comprehensive()
+                        with self.auth_lock:
+                            reauthenticated = self.handle_auth_failure(403)
                 elif response.status_code == 401:
                     self.logger.warning(f"❌ Não autorizado (401) para {url}")
                     if attempt == 0:
-                        self.logger.info("🔄 Tentando reautenticar...")
-                        if self.username and self.password:
-                            self.authenticate_comprehensive()
+                        with self.auth_lock:
+                            reauthenticated = self.handle_auth_failure(401)
                 else:
                     self.logger.warning(f"❌ HTTP Error {response.status_code} para {url}")
                 
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
+                # Só erros transitórios (5xx, 429) e recusas seguidas de novo login são repetidos
+                retryable = status >= 500 or status == 429 or reauthenticated
+                if retryable and attempt < max_retries - 1:
+                    self._wait_before_retry(url, attempt, breaker_key, skip_delay=reauthenticated)
                 else:
-                    self.stats['errors'] += 1
+                    self.count_failed_request()
                     return None
             
             except Exception as e:
                 self.logger.warning(f"❌ Erro na tentativa {attempt + 1} para {url}: {e}")
+                self.circuit_breakers.record_failure(
+                    url, type(e).__name__, host_failure=isinstance(e, requests.exceptions.RequestException),
+                    key=breaker_key
+                )
                 if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
+                    self._wait_before_retry(url, attempt, breaker_key)
                 else:
-                    self.stats['errors'] += 1
+                    self.count_failed_request()
                     return None
 
+    def _wait_before_retry(self, url: str, attempt: int, breaker_key: Optional[str] = None,
+                           skip_delay: bool = False):
+        """Backoff entre tentativas - sem espera se o circuito acabou de abrir (a próxima será recusada)"""
+        breakers = self.circuit_breakers
+        if skip_delay or breakers.budget_exhausted or breakers.retry_after(url, key=breaker_key) > 0:
+            return
+        time.sleep(2 ** attempt)
+
+    def count_failed_request(self):
+        """Requisição que falhou após as tentativas - conta no relatório e no orçamento"""
+        with self.stats_lock:
+            self.stats['errors'] += 1
+        self.circuit_breakers.record_failed_request()
+
     def test_api_access(self):
         """Testa acesso à API antes de iniciar coleta"""
         self.logger.info("🧪 Testando acesso à API...")
@@ -401,21 +739,37 @@ class LiferayAPICollector:
         self.logger.error("❌ Nenhuma API acessível - verifique credenciais e permissões")
         return False
 
-    def collect_paginated_data(self, endpoint: str, data_key: str, page_size: int = 20) -> List[Dict]:
-        """Coleta dados paginados de um endpoint com melhor tratamento de erro"""
+    def fetch_page(self, endpoint: str, page: int, page_size: int = 20, sort: str = None) -> Optional[Dict]:
+        """Busca uma única página de um endpoint paginado"""
+        url = f"{self.base_url}{endpoint}"
+        params = {'page': page, 'pageSize': page_size}
+        if sort:
+            params['sort'] = sort
+        return self.make_request(url, params)
+
+    def collect_paginated_data(self, endpoint: str, data_key: str, page_size: int = 20,
+                               collection: Optional[str] = None) -> List[Dict]:
+        """
+        Coleta dados paginados de um endpoint com melhor tratamento de erro.
+        
+        Com `collection`, os itens de cada página alimentam o perfil dos dados.
+        """
         all_data = []
         page = 1
         total_pages = None
         
         self.logger.info(f"📊 Iniciando coleta de {data_key}...")
+        self.failed_sources.pop(endpoint, None)
         
         while True:
-            url = f"{self.base_url}{endpoint}"
-            params = {'page': page, 'pageSize': page_size}
-            
-            data = self.make_request(url, params)
+            data = self.fetch_page(endpoint, page, page_size)
             if not data:
                 self.logger.error(f"❌ Falha ao obter dados de {data_key} na página {page}")
+                self.failed_sources[endpoint] = {
+                    'fonte': data_key,
+                    'pagina': page,
+                    'registros_obtidos': len(all_data)
+                }
                 break
                 
             # Primeira página - obter informações totais
@@ -433,72 +787,118 @@ class LiferayAPICollector:
             items = data.get('items', [])
             all_data.extend(items)
             
-            self.logger.info(f"📄 Página {page}/{total_pages}: {len(items)} itens coletados")
+            self.page_sampler.record_page(endpoint, page, total_pages, len(items),
+                                          latency=self.last_request_latency)
+            self.data_profile.observe_page(endpoint, len(items), self.last_response_bytes,
+                                           self.last_request_latency)
+            self.data_profile.observe_records(collection, items)
             
             # Verificar se há mais páginas
             if page >= total_pages:
                 break
                 
             page += 1
-            time.sleep(0.5)  # Rate limiting
+            if self.replay is None:
+                time.sleep(0.5)  # Rate limiting
         
+        self.page_sampler.finish(endpoint)
         self.logger.info(f"✅ Coleta de {data_key} concluída: {len(all_data)} registros")
         return all_data
 
+    def collection_endpoint(self, collection: str, folder_id=None) -> str:
+        """Endpoint da API Headless de cada coleção"""
+        if collection == 'documents':
+            return f"/o/headless-delivery/v1.0/document-folders/{folder_id}/documents"
+        return f"/o/headless-delivery/v1.0/sites/{self.site_id}/{self.COLLECTION_PATHS[collection]}"
+
+    def store_collection(self, collection: str, data: List[Dict]) -> Optional[str]:
+        """Salva uma coleção, registrando estatísticas e manifesto"""
+        if not data:
+            return None
+        filename = self.save_collection(f"{collection}.json", data)
+        self.manifest.add_all(collection, data)
+        if self.reference_resolver is not None:
+            self.reference_resolver.add_records(data)
+        self.stats[collection] = len(data)
+        self.logger.info(self.COLLECTION_SAVED_MESSAGES[collection].format(count=len(data), filename=filename))
+        return filename
+
     # Métodos de coleta individuais (mesmos da versão anterior)
     def collect_structured_contents(self):
         """Coleta conteúdos estruturados"""
-        endpoint = f"/o/headless-delivery/v1.0/sites/{self.site_id}/structured-contents"
-        data = self.collect_paginated_data(endpoint, "conteúdos estruturados")
-        
-        if data:
-            filename = os.path.join(self.output_dir, "structured_contents.json")
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            self.stats['structured_contents'] = len(data)
-            self.logger.info(f"💾 Salvos {len(data)} conteúdos estruturados em {filename}")
+        endpoint = self.collection_endpoint('structured_contents')
+        data = self.collect_paginated_data(endpoint, "conteúdos estruturados",
+                                           collection='structured_contents')
+        self.store_collection('structured_contents', data)
 
     def collect_content_folders(self):
         """Coleta pastas de conteúdo"""
-        endpoint = f"/o/headless-delivery/v1.0/sites/{self.site_id}/structured-content-folders"
-        data = self.collect_paginated_data(endpoint, "pastas de conteúdo", page_size=10)
-        
-        if data:
-            filename = os.path.join(self.output_dir, "content_folders.json")
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            self.stats['content_folders'] = len(data)
-            self.logger.info(f"💾 Salvas {len(data)} pastas de conteúdo em {filename}")
+        endpoint = self.collection_endpoint('content_folders')
+        data = self.collect_paginated_data(endpoint, "pastas de conteúdo", page_size=10,
+                                           collection='content_folders')
+        self.store_collection('content_folders', data)
 
     def collect_site_pages(self):
         """Coleta páginas do site"""
-        endpoint = f"/o/headless-delivery/v1.0/sites/{self.site_id}/site-pages"
-        data = self.collect_paginated_data(endpoint, "páginas do site", page_size=10)
-        
-        if data:
-            filename = os.path.join(self.output_dir, "site_pages.json")
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            self.stats['site_pages'] = len(data)
-            self.logger.info(f"💾 Salvas {len(data)} páginas do site em {filename}")
+        endpoint = self.collection_endpoint('site_pages')
+        data = self.collect_paginated_data(endpoint, "páginas do site", page_size=10,
+                                           collection='site_pages')
+        self.store_collection('site_pages', data)
 
     def collect_document_folders(self):
         """Coleta pastas de documentos"""
-        endpoint = f"/o/headless-delivery/v1.0/sites/{self.site_id}/document-folders"
-        folders = self.collect_paginated_data(endpoint, "pastas de documentos")
+        endpoint = self.collection_endpoint('document_folders')
+        folders = self.collect_paginated_data(endpoint, "pastas de documentos",
+                                              collection='document_folders')
         
         if folders:
-            filename = os.path.join(self.output_dir, "document_folders.json")
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(folders, f, ensure_ascii=False, indent=2)
-            self.stats['document_folders'] = len(folders)
-            self.logger.info(f"💾 Salvas {len(folders)} pastas de documentos em {filename}")
+            self.store_collection('document_folders', folders)
             return folders
         return []
 
+    @staticmethod
+    def folder_documents_filename(folder: Dict) -> str:
+        """Nome do arquivo com os documentos de uma pasta"""
+        folder_id = folder.get('id')
+        safe_folder_name = re.sub(r'[^\w\-_]', '_', folder.get('name', f'Pasta_{folder_id}'))[:50]
+        return f"documents_folder_{folder_id}_{safe_folder_name}.json"
+
+    def save_folder_documents(self, folder: Dict, documents: List[Dict]):
+        """Marca a pasta de origem nos documentos e salva o arquivo da pasta"""
+        folder_id = folder.get('id')
+        folder_name = folder.get('name', f'Pasta_{folder_id}')
+        
+        # Adicionar informação da pasta aos documentos
+        for doc in documents:
+            doc['source_folder'] = {
+                'id': folder_id,
+                'name': folder_name
+            }
+        
+        # Salvar documentos da pasta individualmente
+        if documents:
+            self.save_collection(self.folder_documents_filename(folder), documents)
+
+    def store_documents(self, all_documents: List[Dict]):
+        """Salva todos os documentos em um arquivo consolidado"""
+        if all_documents:
+            filename = self.save_collection("all_documents.json", all_documents)
+            self.manifest.add_all('documents', all_documents)
+            if self.reference_resolver is not None:
+                self.reference_resolver.add_records(all_documents)
+            self.stats['documents'] = len(all_documents)
+            self.logger.info(f"💾 Salvos {len(all_documents)} documentos em {filename}")
+
     def collect_documents_from_folders(self, folders: List[Dict]):
-        """Coleta documentos de cada pasta"""
-        all_documents = []
+        """
+        Coleta documentos de cada pasta.
+        
+        Pastas que falham são adiadas para o fim e tentadas de novo quando o
+        circuit breaker do endpoint liberar a sondagem; as que falharem outra
+        vez ficam em failed_sources (relatório) com os documentos obtidos.
+        """
+        documents_by_folder = {}
+        deferred = []
         
         for i, folder in enumerate(folders, 1):
             folder_id = folder.get('id')
@@ -506,41 +906,92 @@ class LiferayAPICollector:
             
             self.logger.info(f"📁 Coletando documentos da pasta {i}/{len(folders)}: {folder_name}")
             
-            endpoint = f"/o/headless-delivery/v1.0/document-folders/{folder_id}/documents"
-            documents = self.collect_paginated_data(endpoint, f"documentos da pasta {folder_name}")
-            
-            # Adicionar informação da pasta aos documentos
-            for doc in documents:
-                doc['source_folder'] = {
-                    'id': folder_id,
-                    'name': folder_name
-                }
-            
-            all_documents.extend(documents)
+            endpoint = self.collection_endpoint('documents', folder_id)
+            documents = self.collect_paginated_data(endpoint, f"documentos da pasta {folder_name}",
+                                                    collection='documents')
             
-            # Salvar documentos da pasta individualmente
-            if documents:
-                safe_folder_name = re.sub(r'[^\w\-_]', '_', folder_name)[:50]
-                folder_filename = os.path.join(
-                    self.output_dir, 
-                    f"documents_folder_{folder_id}_{safe_folder_name}.json"
+            if endpoint in self.failed_sources and not self.circuit_breakers.budget_exhausted:
+                deferred.append(folder)
+            documents_by_folder[folder_id] = documents
+        
+        if deferred:
+            wait = max(
+                self.circuit_breakers.retry_after(self.base_url + self.collection_endpoint('documents', f.get('id')))
+                for f in deferred
+            )
+            self.logger.info(f"⏳ Repetindo {len(deferred)} pasta(s) adiada(s) em {wait:.0f}s")
+            time.sleep(wait)
+            for folder in deferred:
+                folder_id = folder.get('id')
+                documents = self.collect_paginated_data(
+                    self.collection_endpoint('documents', folder_id),
+                    f"documentos da pasta {folder.get('name', f'Pasta_{folder_id}')} (repetição)"
                 )
-                with open(folder_filename, 'w', encoding='utf-8') as f:
-                    json.dump(documents, f, ensure_ascii=False, indent=2)
+                partial = documents_by_folder[folder_id]
+                if len(documents) >= len(partial):
+                    # Os registros da primeira tentativa já entraram no perfil dos dados
+                    seen = {record_id(doc) for doc in partial}
+                    self.data_profile.observe_records(
+                        'documents', (doc for doc in documents if record_id(doc) not in seen)
+                    )
+                    documents_by_folder[folder_id] = documents
         
-        # Salvar todos os documentos em um arquivo consolidado
-        if all_documents:
-            filename = os.path.join(self.output_dir, "all_documents.json")
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(all_documents, f, ensure_ascii=False, indent=2)
-            self.stats['documents'] = len(all_documents)
-            self.logger.info(f"💾 Salvos {len(all_documents)} documentos em {filename}")
+        all_documents = []
+        for folder in folders:
+            documents = documents_by_folder[folder.get('id')]
+            self.save_folder_documents(folder, documents)
+            all_documents.extend(documents)
+        
+        self.store_documents(all_documents)
+
+    def collect_referenced_entities(self):
+        """Busca uma vez cada entidade referenciada pelos registros salvos"""
+        if self.reference_resolver is None:
+            return
+        for kind, entities in self.reference_resolver.resolve().items():
+            if entities:
+                filename = self.save_collection(f"referenced_{kind}.json", entities)
+                self.logger.info(f"💾 Salvas {len(entities)} entidades referenciadas ({kind}) em {filename}")
+
+    def download_document(self, document: Dict, on_progress=None) -> Optional[str]:
+        """
+        Baixa o arquivo de um documento para output_dir/files.
+        
+        `on_progress` é chamado a cada bloco gravado (ex.: renovar o lease na fila).
+        """
+        content_url = document.get('contentUrl')
+        if not content_url or self.replay is not None:
+            return None
+        
+        self.ensure_authenticated()
+        title = re.sub(r'[^\w\-_]', '_', document.get('title') or '')[:50]
+        extension = document.get('fileExtension')
+        filename = f"{document.get('id')}_{title}" + (f".{extension}" if extension else '')
+        path = self._output_path(os.path.join('files', filename))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        response = self.session.get(urljoin(self.base_url + '/', content_url.lstrip('/')),
+                                    stream=True, timeout=60, verify=self.verify_ssl)
+        response.raise_for_status()
+        tmp_path = f"{path}.part"
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+                if on_progress is not None:
+                    on_progress()
+        os.replace(tmp_path, path)
+        return path
 
     def generate_summary_report(self):
         """Gera relatório resumo da coleta"""
         end_time = datetime.now()
         duration = end_time - self.stats['start_time']
         
+        # Manifesto id → digest e alterações desde a coleta anterior
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.manifest.generated_at = end_time.isoformat()
+        changes = rotate_and_diff(self.output_dir, self.manifest)
+        
         summary = {
             'coleta_realizada_em': end_time.isoformat(),
             'duracao_total': str(duration),
@@ -550,19 +1001,27 @@ class LiferayAPICollector:
                 'paginas_do_site': self.stats['site_pages'],
                 'pastas_de_documentos': self.stats['document_folders'],
                 'documentos': self.stats['documents'],
-                'erros': self.stats['errors']
+                'erros': self.stats['errors'],
+                'requisicoes_recusadas': self.stats['rejected_requests']
             },
+            'fontes_com_falha': self.failed_sources,
+            'circuit_breakers': self.circuit_breakers.report(),
+            'alteracoes': changes['resumo'] if changes else None,
+            'perfil_dos_dados': self.data_profile.to_dict(),
+            'referencias': self.reference_resolver.summary if self.reference_resolver else None,
             'configuracao': {
                 'base_url': self.base_url,
                 'site_id': self.site_id,
                 'output_dir': self.output_dir,
                 'username': self.username,
                 'verify_ssl': self.verify_ssl,
+                'compressao_saida': self.output_writer.compression,
+                'modo_offline': self.replay is not None,
                 'csrf_token_obtido': bool(self.csrf_token)
             }
         }
         
-        filename = os.path.join(self.output_dir, "summary_report.json")
+        filename = self._output_path("summary_report.json")
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(summary, f, ensure_ascii=False, indent=2)
         
@@ -576,7 +1035,13 @@ class LiferayAPICollector:
         self.logger.info(f"📂 Pastas de documentos: {self.stats['document_folders']}")
         self.logger.info(f"📋 Documentos: {self.stats['documents']}")
         self.logger.info(f"❌ Erros: {self.stats['errors']}")
+        if self.failed_sources:
+            self.logger.warning(f"🔌 Fontes com falha: {', '.join(s['fonte'] for s in self.failed_sources.values())}")
         self.logger.info(f"⏱️ Duração total: {duration}")
+        throughput = summary['perfil_dos_dados']['total']
+        if throughput['paginas']:
+            self.logger.info(f"📶 Vazão: {throughput['paginas']} páginas, {throughput['bytes']} bytes "
+                             f"em {throughput['segundos_em_requisicao']}s de requisição")
         self.logger.info(f"📄 Relatório salvo em: {filename}")
 
     def run_full_collection(self):
@@ -584,29 +1049,43 @@ class LiferayAPICollector:
         self.logger.info("🚀 Iniciando coleta completa da API Headless do Liferay")
         
         # Testar acesso à API primeiro
-        if not self.test_api_access():
+        with self.profiler.phase('auth'):
+            api_ok = self.test_api_access()
+        if not api_ok:
             self.logger.error("❌ Falha no teste de acesso - abortando coleta")
             return False
         
         try:
             # 1. Conteúdos estruturados
-            self.collect_structured_contents()
+            with self.profiler.phase('structured_contents'):
+                self.collect_structured_contents()
             
             # 2. Pastas de conteúdo
-            self.collect_content_folders()
+            with self.profiler.phase('content_folders'):
+                self.collect_content_folders()
             
             # 3. Páginas do site
-            self.collect_site_pages()
+            with self.profiler.phase('site_pages'):
+                self.collect_site_pages()
             
             # 4. Pastas de documentos
-            document_folders = self.collect_document_folders()
+            with self.profiler.phase('document_folders'):
+                document_folders = self.collect_document_folders()
             
             # 5. Documentos (se houver pastas)
             if document_folders:
-                self.collect_documents_from_folders(document_folders)
+                with self.profiler.phase('documents'):
+                    self.collect_documents_from_folders(document_folders)
             
-            # 6. Gerar relatório
-            self.generate_summary_report()
+            # 6. Entidades referenciadas (se habilitado)
+            if self.reference_resolver is not None:
+                with self.profiler.phase('references'):
+                    self.collect_referenced_entities()
+            
+            # 7. Gerar relatório
+            with self.profiler.phase('report'):
+                self.generate_summary_report()
+            self.profiler.write_summary()
             
             self.logger.info("🎉 Coleta completa finalizada!")
             return True
@@ -621,6 +1100,8 @@ class LiferayAPICollector:
 def main():
     """Função principal com SSL desabilitado"""
     
+    setup_logging()
+    
     # CONFIGURAÇÕES
     config = {
         'base_url': 'https://10.242.0.138:8443',
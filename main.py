@@ -5,9 +5,155 @@ Permite executar coletas específicas ou completa com suporte a SSL
 """
 
 import argparse
+import multiprocessing
+import os
 import sys
 from liferay_collector import LiferayAPICollector
+from collector_logging import setup_logging, shutdown_logging
 import config
+from crawl_planner import CrawlPlanner
+from run_manifest import RunManifest, diff_manifests, format_changelog
+from watch_mode import SourceWatcher
+from work_queue import CrawlWorker, WorkQueue, assemble_outputs, seed_collection_tasks
+
+def build_collector(args) -> LiferayAPICollector:
+    """Cria o coletor a partir dos argumentos (sem acesso à rede)"""
+    return LiferayAPICollector(
+        base_url=args.base_url,
+        site_id=args.site_id,
+        username=args.username,
+        password=args.password,
+        csrf_token=args.csrf_token,
+        output_dir=args.output_dir,
+        verify_ssl=args.verify_ssl,  # ← NOVA OPÇÃO SSL
+        session_cache_file=args.session_cache,
+        session_ttl=config.SESSION_CACHE_TTL,
+        log_progress_every=config.LOG_PROGRESS_EVERY,
+        output_compression=args.compress,
+        compression_level=args.compression_level,
+        pretty_output=args.pretty_output,
+        output_index=config.OUTPUT_INDEX,
+        archive_dir=None if args.offline else resolve_archive_dir(args, args.archive),
+        offline_archive=resolve_archive_dir(args, args.offline),
+        resolve_references=args.resolve_references,
+        reference_cache_file=config.REFERENCE_CACHE_FILE,
+        reference_cache_size=config.REFERENCE_CACHE_SIZE,
+        reference_cache_ttl=config.REFERENCE_CACHE_TTL,
+        reference_workers=config.REFERENCE_WORKERS,
+        breaker_threshold=config.BREAKER_FAILURE_THRESHOLD,
+        host_breaker_threshold=config.BREAKER_HOST_FAILURE_THRESHOLD,
+        breaker_reset_timeout=config.BREAKER_RESET_TIMEOUT,
+        failure_budget=args.failure_budget or None,
+        profile=args.profile
+    )
+
+
+def resolve_archive_dir(args, archive):
+    """Diretório do arquivo de respostas (relativo a output_dir)"""
+    if not archive:
+        return None
+    if archive is True:
+        archive = config.ARCHIVE_DIR or 'archive'
+    return archive if os.path.isabs(archive) else os.path.join(args.output_dir, archive)
+
+
+def configure_logging(args):
+    """Configura logging em thread de fundo"""
+    setup_logging(
+        level='DEBUG' if args.verbose else config.LOG_LEVEL,
+        log_file=config.LOG_FILE if config.LOG_TO_FILE else None,
+        json_format=config.LOG_FORMAT == 'json'
+    )
+
+
+def run_queue_worker(args):
+    """Processo worker: consome a fila até esvaziar"""
+    configure_logging(args)
+    queue = WorkQueue(args.queue, journal_mode=config.QUEUE_JOURNAL_MODE)
+    try:
+        CrawlWorker(queue, build_collector(args), lease_seconds=args.lease_seconds,
+                    page_sizes=config.PAGE_SIZES).run()
+    finally:
+        queue.close()
+
+
+def run_queue_mode(args, collect_options):
+    """Coleta distribuída: enfileirar, processar com N workers e montar as saídas"""
+    run_all = not (args.enqueue or args.work or args.assemble)
+    queue = WorkQueue(args.queue, journal_mode=config.QUEUE_JOURNAL_MODE)
+    
+    try:
+        if args.retry_failed:
+            print(f"🔁 {queue.retry_failed()} tarefa(s) com falha recolocada(s) na fila")
+        
+        if args.enqueue or run_all:
+            seeded = seed_collection_tasks(queue, build_collector(args), collect_options,
+                                           config.PAGE_SIZES, download_files=args.download_files)
+            print(f"📥 {seeded} tarefa(s) inicial(is) enfileirada(s) em {args.queue}")
+        
+        if args.work or run_all:
+            print(f"👷 Iniciando {args.workers} worker(s)...")
+            if args.workers == 1:
+                run_queue_worker(args)
+            else:
+                shutdown_logging()  # cada processo configura o próprio listener
+                processes = [multiprocessing.Process(target=run_queue_worker, args=(args,))
+                             for _ in range(args.workers)]
+                for process in processes:
+                    process.start()
+                for process in processes:
+                    process.join()
+            configure_logging(args)
+        
+        counts = queue.counts()
+        print(f"📊 Fila: {counts['done']} concluídas, {counts['pending']} pendentes, "
+              f"{counts['leased']} em execução, {counts['failed']} com falha")
+        
+        if args.assemble or run_all:
+            if not queue.is_drained():
+                print("⚠️  Ainda há tarefas pendentes - montando saídas parciais")
+            collector = build_collector(args)
+            assemble_outputs(queue, collector)
+            collector.collect_referenced_entities()
+            collector.generate_summary_report()
+            print(f"📁 Dados salvos em: {args.output_dir}/")
+    finally:
+        queue.close()
+
+
+def run_watch_mode(args, collect_options):
+    """Consulta as fontes continuamente até Ctrl+C"""
+    watcher = SourceWatcher(
+        build_collector(args),
+        page_sizes=config.PAGE_SIZES,
+        min_interval=args.watch_min_interval,
+        max_interval=args.watch_max_interval,
+        backoff=config.WATCH_BACKOFF,
+        collect_options=collect_options
+    )
+    print(f"👀 Modo watch - dados em {args.output_dir}/ (Ctrl+C para encerrar)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.save_state()
+        print("\n⏹️  Modo watch encerrado")
+        for entry in watcher.schedule():
+            print(f"  {entry['fonte']:<30} a cada {entry['intervalo_s']}s")
+
+
+def print_crawl_plan(args, collect_options):
+    """Exibe a estimativa de coleta a partir do estado salvo em output_dir"""
+    planner = CrawlPlanner(
+        output_dir=args.output_dir,
+        page_sizes=config.PAGE_SIZES,
+        rate_limit_delay=config.RATE_LIMIT_DELAY,
+        concurrency=args.plan_concurrency
+    )
+    if not planner.summary:
+        print(f"⚠️  Nenhuma coleta anterior em {args.output_dir}/ - usando estimativas padrão")
+    print("🧮 PLANO DE COLETA")
+    print(planner.format_plan(planner.build_plan(collect_options)))
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -33,6 +179,31 @@ Exemplos de uso:
 
   # Coleta com configurações personalizadas
   python main.py --all --site-id 12345 --csrf-token novo_token
+
+  # Coleta com saída compacta comprimida
+  python main.py --all --compact --compress zstd
+
+  # Coleta distribuída com 4 processos (outros hosts podem usar --work na mesma fila)
+  python main.py --all --queue fila.sqlite --workers 4
+
+  # Manter os dados atualizados continuamente (substitui o cron)
+  python main.py --all --watch
+
+  # Arquivar respostas e depois regenerar as saídas sem rede
+  python main.py --all --archive
+  python main.py --all --offline --compact
+
+  # Buscar autores, categorias e conteúdos relacionados (uma vez por entidade)
+  python main.py --all --resolve-references
+
+  # Medir CPU e memória de cada fase (perfis em <output-dir>/profile/)
+  python main.py --all --profile
+
+  # Comparar duas coletas pelos manifestos
+  python main.py --diff coleta_antiga/manifest.json liferay_data/manifest.json
+
+  # Estimar requisições/tempo com base na última coleta (sem rede)
+  python main.py --all --plan --plan-concurrency 4
         """
     )
     
@@ -49,6 +220,17 @@ Exemplos de uso:
                        help='Token CSRF (opcional - obtido automaticamente)')
     parser.add_argument('--output-dir', default=config.OUTPUT_DIR,
                        help=f'Diretório de saída (padrão: {config.OUTPUT_DIR})')
+    parser.add_argument('--compress', choices=['gzip', 'zstd'], default=config.OUTPUT_COMPRESSION,
+                       help='Comprimir as coleções salvas (gzip ou zstd)')
+    parser.add_argument('--compression-level', type=int, default=config.OUTPUT_COMPRESSION_LEVEL,
+                       help='Nível de compressão (padrão: gzip 6, zstd 3)')
+    parser.add_argument('--compact', action='store_false', dest='pretty_output',
+                       help='Salvar JSON compacto (um registro por linha) em vez de indentado')
+    parser.set_defaults(pretty_output=config.OUTPUT_PRETTY)
+    parser.add_argument('--session-cache', default=config.SESSION_CACHE_FILE,
+                       help=f'Arquivo de cache da sessão autenticada (padrão: {config.SESSION_CACHE_FILE})')
+    parser.add_argument('--no-session-cache', action='store_const', const=None, dest='session_cache',
+                       help='Não reutilizar sessão salva (faz login a cada execução)')
     
     # Configurações SSL
     parser.add_argument('--no-ssl', action='store_false', dest='verify_ssl',
@@ -76,26 +258,64 @@ Exemplos de uso:
                        help='Modo verboso (mais logs)')
     parser.add_argument('--dry-run', action='store_true',
                        help='Simular execução (não fazer requisições)')
+    # Coleta distribuída
+    parser.add_argument('--queue', metavar='ARQUIVO',
+                       help='Fila SQLite compartilhada entre workers (coleta distribuída); '
+                            'sobre uma fila já concluída inicia uma nova coleta')
+    parser.add_argument('--enqueue', action='store_true',
+                       help='Com --queue: apenas enfileirar as tarefas iniciais')
+    parser.add_argument('--work', action='store_true',
+                       help='Com --queue: apenas processar tarefas (pode rodar em vários hosts)')
+    parser.add_argument('--assemble', action='store_true',
+                       help='Com --queue: apenas montar os arquivos de saída a partir da fila')
+    parser.add_argument('--retry-failed', action='store_true',
+                       help='Com --queue: recolocar na fila as tarefas que falharam')
+    parser.add_argument('--workers', type=int, default=config.QUEUE_WORKERS,
+                       help=f'Processos worker locais (padrão: {config.QUEUE_WORKERS})')
+    parser.add_argument('--lease-seconds', type=float, default=config.QUEUE_LEASE_SECONDS,
+                       help=f'Tempo de lease de cada tarefa (padrão: {config.QUEUE_LEASE_SECONDS}s)')
+    parser.add_argument('--download-files', action='store_true',
+                       help='Com --queue: baixar também os arquivos dos documentos')
     
-    args = parser.parse_args()
+    # Arquivo de respostas
+    parser.add_argument('--archive', nargs='?', const=True, default=config.ARCHIVE_DIR, metavar='DIR',
+                       help='Arquivar as respostas brutas (padrão: <output-dir>/archive)')
+    parser.add_argument('--offline', nargs='?', const=True, default=None, metavar='DIR',
+                       help='Reprocessar a partir do arquivo de respostas, sem rede '
+                            '(mesmos --base-url e --site-id da coleta arquivada)')
     
-    # Validar credenciais
-    if not args.username or not args.password:
-        print("❌ Erro: Usuário e senha são obrigatórios!")
-        print("   Configure no arquivo config.py ou use --username e --password")
-        return
+    # Modo watch
+    parser.add_argument('--watch', action='store_true',
+                       help='Processo contínuo: consulta cada fonte em intervalo adaptativo')
+    parser.add_argument('--watch-min-interval', type=float, default=config.WATCH_MIN_INTERVAL,
+                       help=f'Intervalo mínimo entre consultas de uma fonte (padrão: {config.WATCH_MIN_INTERVAL}s)')
+    parser.add_argument('--watch-max-interval', type=float, default=config.WATCH_MAX_INTERVAL,
+                       help=f'Intervalo máximo entre consultas de uma fonte (padrão: {config.WATCH_MAX_INTERVAL}s)')
     
-    print(f"🔐 Usando credenciais: {args.username}")
-    if args.csrf_token:
-        print(f"🎫 Token CSRF fornecido: {args.csrf_token[:10]}...")
-    else:
-        print("🎫 Token CSRF será obtido automaticamente após login")
+    parser.add_argument('--failure-budget', type=int, default=config.FAILURE_BUDGET,
+                       help=f'Requisições com falha antes de recusar as demais (padrão: {config.FAILURE_BUDGET}; '
+                            '0 = sem limite)')
+    parser.add_argument('--resolve-references', action='store_true', default=config.RESOLVE_REFERENCES,
+                       help='Buscar as entidades referenciadas (autor, categorias, conteúdos relacionados) '
+                            'uma vez cada, com cache em ' + config.REFERENCE_CACHE_FILE)
     
-    # Informar sobre SSL
-    if args.verify_ssl:
-        print("🔒 Verificação SSL habilitada")
-    else:
-        print("🔓 Verificação SSL desabilitada (certificados auto-assinados aceitos)")
+    parser.add_argument('--profile', action='store_true',
+                       help='Perfil de CPU (cProfile) e memória (tracemalloc) por fase em <output-dir>/profile/')
+    
+    parser.add_argument('--diff', nargs=2, metavar=('ANTIGO', 'NOVO'),
+                       help='Comparar dois manifest.json e exibir o changelog (sem rede)')
+    parser.add_argument('--plan', action='store_true',
+                       help='Estimar requisições, bytes e tempo com base na última coleta (sem rede)')
+    parser.add_argument('--plan-concurrency', type=int, default=1,
+                       help='Concorrência considerada no tempo estimado do plano (padrão: 1)')
+    
+    args = parser.parse_args()
+    
+    # Comparação de manifestos - não exige credenciais nem acessa a rede
+    if args.diff:
+        old_manifest, new_manifest = (RunManifest.load(path) for path in args.diff)
+        print(format_changelog(diff_manifests(old_manifest, new_manifest)))
+        return
     
     # Determinar o que coletar
     if args.all:
@@ -122,6 +342,29 @@ Exemplos de uso:
         print("   Use --help para ver todas as opções.")
         return
     
+    # Modo planejamento - não exige credenciais nem acessa a rede
+    if args.plan:
+        print_crawl_plan(args, collect_options)
+        return
+    
+    # Validar credenciais (não usadas no modo offline)
+    if not args.offline and (not args.username or not args.password):
+        print("❌ Erro: Usuário e senha são obrigatórios!")
+        print("   Configure no arquivo config.py ou use --username e --password")
+        return
+    
+    print(f"🔐 Usando credenciais: {args.username}")
+    if args.csrf_token:
+        print(f"🎫 Token CSRF fornecido: {args.csrf_token[:10]}...")
+    else:
+        print("🎫 Token CSRF será obtido automaticamente após login")
+    
+    # Informar sobre SSL
+    if args.verify_ssl:
+        print("🔒 Verificação SSL habilitada")
+    else:
+        print("🔓 Verificação SSL desabilitada (certificados auto-assinados aceitos)")
+    
     # Modo dry-run
     if args.dry_run:
         print("🔍 MODO DRY-RUN - Simulando execução")
@@ -131,62 +374,96 @@ Exemplos de uso:
         print(f"  Usuário: {args.username}")
         print(f"  SSL Verify: {args.verify_ssl}")
         print(f"  Output: {args.output_dir}")
+        print(f"  Compressão: {args.compress or 'nenhuma'}{'' if args.pretty_output else ' (compacto)'}")
+        print(f"  Cache de sessão: {args.session_cache or 'desabilitado'}")
+        print(f"  Resolver referências: {'sim' if args.resolve_references else 'não'}")
+        print(f"  Perfil por fase: {'sim' if args.profile else 'não'}")
         print(f"  Coletas selecionadas:")
         for key, value in collect_options.items():
             if value:
                 print(f"    ✓ {key}")
+        print()
+        print_crawl_plan(args, collect_options)
         print("\nSimulação concluída. Use sem --dry-run para executar de verdade.")
         return
     
+    # Configurar logging em thread de fundo
+    configure_logging(args)
+    
+    # Modo watch - mantém a sessão aberta e aplica mudanças incrementais
+    if args.watch:
+        run_watch_mode(args, collect_options)
+        return
+    
+    # Coleta distribuída via fila
+    if args.queue:
+        try:
+            run_queue_mode(args, collect_options)
+        except KeyboardInterrupt:
+            print("\n⚠️  Coleta interrompida - tarefas em andamento voltam para a fila quando o lease expirar")
+            sys.exit(1)
+        return
+    
     # Criar coletor
     try:
-        collector = LiferayAPICollector(
-            base_url=args.base_url,
-            site_id=args.site_id,
-            username=args.username,
-            password=args.password,
-            csrf_token=args.csrf_token,
-            output_dir=args.output_dir,
-            verify_ssl=args.verify_ssl  # ← NOVA OPÇÃO SSL
-        )
+        collector = build_collector(args)
         
         print("🚀 Iniciando coleta...")
         print(f"📊 Dados selecionados: {sum(collect_options.values())}/{len(collect_options)}")
         
-        # Executar coletas selecionadas
+        # Executar coletas selecionadas (cada fase com perfil próprio se --profile)
+        profiler = collector.profiler
         document_folders = []
         
+        if not args.offline:
+            with profiler.phase('auth'):
+                collector.ensure_authenticated()
+        
         if collect_options['structured_contents']:
             print("\n📄 Coletando conteúdos estruturados...")
-            collector.collect_structured_contents()
+            with profiler.phase('structured_contents'):
+                collector.collect_structured_contents()
         
         if collect_options['content_folders']:
             print("\n📁 Coletando pastas de conteúdo...")
-            collector.collect_content_folders()
+            with profiler.phase('content_folders'):
+                collector.collect_content_folders()
         
         if collect_options['site_pages']:
             print("\n🌐 Coletando páginas do site...")
-            collector.collect_site_pages()
+            with profiler.phase('site_pages'):
+                collector.collect_site_pages()
         
         if collect_options['document_folders']:
             print("\n📂 Coletando pastas de documentos...")
-            document_folders = collector.collect_document_folders()
+            with profiler.phase('document_folders'):
+                document_folders = collector.collect_document_folders()
         
         if collect_options['documents'] and document_folders:
             print("\n📋 Coletando documentos...")
-            collector.collect_documents_from_folders(document_folders)
+            with profiler.phase('documents'):
+                collector.collect_documents_from_folders(document_folders)
         elif collect_options['documents'] and not document_folders:
             print("⚠️  Aviso: Coleta de documentos solicitada, mas nenhuma pasta foi encontrada.")
             print("   Execute primeiro a coleta de pastas de documentos.")
         
+        if args.resolve_references:
+            print("\n🔗 Resolvendo entidades referenciadas...")
+            with profiler.phase('references'):
+                collector.collect_referenced_entities()
+        
         # Gerar relatório
         print("\n📈 Gerando relatório final...")
-        collector.generate_summary_report()
+        with profiler.phase('report'):
+            collector.generate_summary_report()
+        profile_summary = profiler.write_summary()
         
         print(f"\n✅ Coleta finalizada com sucesso!")
         print(f"📁 Dados salvos em: {args.output_dir}/")
         print(f"📋 Relatório: {args.output_dir}/summary_report.json")
-        print(f"📜 Logs: liferay_collector.log")
+        print(f"📜 Logs: {config.LOG_FILE}")
+        if profile_summary:
+            print(f"🔬 Perfil por fase: {profile_summary}")
         
     except KeyboardInterrupt:
         print("\n⚠️  Coleta interrompida pelo usuário")
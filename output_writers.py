@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Camada de saída do Liferay API Collector
+Escrita em streaming de coleções JSON (compactas ou indentadas), com compressão
+gzip/zstd opcional, e leitura correspondente com descompressão sob demanda
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from collection_reader import RecordIndexBuilder, index_path
+
+try:
+    import zstandard
+except ImportError:  # dependência opcional - pip install zstandard
+    zstandard = None
+
+
+COMPRESSION_EXTENSIONS = {
+    None: '',
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+DEFAULT_LEVELS = {
+    'gzip': 6,
+    'zstd': 3,
+}
+
+_READ_CHUNK = 64 * 1024
+_SEPARATOR = re.compile(r'[\s,]*')
+
+
+def check_compression(compression: Optional[str]):
+    """Valida o formato de compressão antes de iniciar a coleta"""
+    if compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError(f"Compressão desconhecida: {compression} (use gzip ou zstd)")
+    if compression == 'zstd' and zstandard is None:
+        raise RuntimeError("Compressão zstd requer o pacote 'zstandard' (pip install zstandard)")
+
+
+def compression_for_path(path: str) -> Optional[str]:
+    """Deduz a compressão pela extensão do arquivo"""
+    for compression, extension in COMPRESSION_EXTENSIONS.items():
+        if extension and path.endswith(extension):
+            return compression
+    return None
+
+
+def output_variants(output_dir: str, filename: str) -> List[str]:
+    """Variantes existentes de `filename` (.json, .json.gz, .json.zst)"""
+    paths = (os.path.join(output_dir, filename + extension) for extension in COMPRESSION_EXTENSIONS.values())
+    return [path for path in paths if os.path.exists(path)]
+
+
+def find_output_file(output_dir: str, filename: str, preferred: Optional[str] = None) -> Optional[str]:
+    """
+    Localiza `filename` (.json) em qualquer uma das variantes comprimidas.
+
+    Se houver mais de uma (ex.: troca de --compress entre coletas), vale
+    `preferred` quando existir, senão a modificada mais recentemente.
+    """
+    variants = output_variants(output_dir, filename)
+    if preferred in variants:
+        return preferred
+    return max(variants, key=os.path.getmtime, default=None)
+
+
+def _replacement_mode(path: str) -> int:
+    """Permissões do arquivo que será substituído, ou as padrão (0666 menos a umask)"""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def open_compressed(path: str) -> io.BufferedIOBase:
+    """Abre um arquivo de saída para leitura binária, descomprimindo em streaming"""
+    compression = compression_for_path(path)
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'zstd':
+        check_compression('zstd')
+        raw = open(path, 'rb')
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    return open(path, 'rb')
+
+
+class JSONArrayWriter:
+    """
+    Grava uma lista JSON registro a registro, sem montar o documento em memória.
+
+    No modo compacto cada registro ocupa uma linha (`[\\n{...},\\n{...}\\n]`);
+    no modo indentado a saída é idêntica a `json.dump(..., indent=2)`.
+    O arquivo é escrito em um temporário e renomeado no `close()`, então
+    leitores nunca veem uma coleção pela metade. Sem compressão, `index=True`
+    grava também o índice lateral usado por collection_reader.CollectionReader.
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None, level: Optional[int] = None,
+                 pretty: bool = False, index: bool = False):
+        check_compression(compression)
+        self.path = path
+        self.pretty = pretty
+        self.count = 0
+        self.offset = 0  # bytes não comprimidos escritos até agora
+        self.index = RecordIndexBuilder() if index and compression is None else None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, self.tmp_path = tempfile.mkstemp(dir=directory, prefix='.writing_', suffix='.tmp')
+        self._raw = os.fdopen(fd, 'wb')
+
+        level = level if level is not None else DEFAULT_LEVELS.get(compression)
+        if compression == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=level, mtime=0)
+        elif compression == 'zstd':
+            self._stream = zstandard.ZstdCompressor(level=level).stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+
+        self._write(b'[')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _write(self, data: bytes):
+        self._stream.write(data)
+        self.offset += len(data)
+
+    def encode(self, record: Dict) -> bytes:
+        if self.pretty:
+            text = json.dumps(record, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+            return ('  ' + text).encode('utf-8')
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def write(self, record: Dict):
+        """Acrescenta um registro à lista"""
+        self._write(b',\n' if self.count else b'\n')
+        encoded = self.encode(record)
+        if self.index is not None:
+            self.index.add(record, self.offset, len(encoded))
+        self._write(encoded)
+        self.count += 1
+
+    def write_all(self, records: Iterable[Dict]):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        self._write(b'\n]' if self.count else b']')
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        # mkstemp cria o temporário com 0600; manter as permissões de uma saída comum
+        os.chmod(self.tmp_path, _replacement_mode(self.path))
+        os.replace(self.tmp_path, self.path)
+        if self.index is not None:
+            self.index.write(index_path(self.path), self.path)
+        elif os.path.exists(index_path(self.path)):
+            os.remove(index_path(self.path))  # índice da versão anterior não vale mais
+
+    def abort(self):
+        """Descarta o arquivo temporário sem tocar na saída anterior"""
+        try:
+            if self._stream is not self._raw:
+                self._stream.close()
+            self._raw.close()
+        finally:
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+
+class OutputWriter:
+    """Configuração de saída compartilhada por todas as coleções de uma coleta"""
+
+    def __init__(self, output_dir: str, compression: Optional[str] = None, level: Optional[int] = None,
+                 pretty: bool = True, index: bool = True):
+        check_compression(compression)
+        self.output_dir = output_dir
+        self.compression = compression
+        self.level = level
+        self.pretty = pretty
+        self.index = index
+
+    def path_for(self, filename: str) -> str:
+        """Caminho final de `filename` (.json) com a extensão da compressão"""
+        return os.path.join(self.output_dir, filename + COMPRESSION_EXTENSIONS[self.compression])
+
+    def open(self, filename: str) -> JSONArrayWriter:
+        os.makedirs(self.output_dir, exist_ok=True)
+        return JSONArrayWriter(self.path_for(filename), compression=self.compression,
+                               level=self.level, pretty=self.pretty, index=self.index)
+
+    def find(self, filename: str) -> Optional[str]:
+        """Arquivo existente de `filename`, preferindo o formato configurado"""
+        return find_output_file(self.output_dir, filename, preferred=self.path_for(filename))
+
+    def write_collection(self, filename: str, records: Iterable[Dict]) -> str:
+        """Grava a coleção inteira e retorna o caminho gerado"""
+        with self.open(filename) as writer:
+            writer.write_all(records)
+        # Variantes em outro formato ficaram desatualizadas
+        for path in output_variants(self.output_dir, filename):
+            if path != writer.path:
+                os.remove(path)
+                if os.path.exists(index_path(path)):
+                    os.remove(index_path(path))
+        return writer.path
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """
+    Itera os registros de uma lista JSON (comprimida ou não) em streaming.
+
+    Aceita tanto a saída compacta quanto a indentada, sem carregar o
+    arquivo inteiro em memória.
+    """
+    decoder = json.JSONDecoder()
+    with io.TextIOWrapper(open_compressed(path), encoding='utf-8') as f:
+        buffer = f.read(_READ_CHUNK).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} não contém uma lista JSON")
+        pos = 1
+        eof = False
+        while True:
+            match = _SEPARATOR.match(buffer, pos)
+            pos = match.end()
+            if pos < len(buffer):
+                if buffer[pos] == ']':
+                    return
+                try:
+                    record, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    yield record
+                    continue
+            elif eof:
+                raise ValueError(f"{path} terminou antes do fim da lista")
+            chunk = f.read(_READ_CHUNK)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def load_collection(path: str) -> List[Dict]:
+    """Carrega a coleção inteira em uma lista"""
+    return list(iter_records(path))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Perfil por fase do Liferay API Collector (--profile)
+Cada fase da coleta roda sob cProfile e tracemalloc; ao final são gravados
+os perfis de CPU (.prof e texto) e um resumo com tempo, pico de memória e
+maiores alocações de cada fase
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Frames do próprio profiler/import que não interessam no resumo de alocações
+_ALLOCATION_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class PhaseProfiler:
+    """
+    Perfil de CPU e memória por fase.
+
+        with collector.profiler.phase('documents'):
+            collector.collect_documents_from_folders(folders)
+
+    Desabilitado, `phase` não faz nada (custo zero na coleta normal).
+    """
+
+    def __init__(self, output_dir: str, enabled: bool = False, top: int = 25):
+        self.output_dir = output_dir
+        self.enabled = enabled
+        self.top = top
+        self.phases: List[Dict] = []
+        self.logger = logging.getLogger(__name__)
+        self._started_tracing = False
+
+    def _phase_path(self, name: str, suffix: str) -> str:
+        return os.path.join(self.output_dir, f"{len(self.phases) + 1:02d}_{name}{suffix}")
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot().filter_traces(_ALLOCATION_FILTERS)
+        profiler = cProfile.Profile()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(_ALLOCATION_FILTERS)
+            self._record(name, profiler, before, after, wall, cpu, current, peak)
+
+    def _record(self, name, profiler, before, after, wall, cpu, current, peak):
+        os.makedirs(self.output_dir, exist_ok=True)
+        prof_path = self._phase_path(name, '.prof')
+        profiler.dump_stats(prof_path)
+
+        text = io.StringIO()
+        stats = pstats.Stats(profiler, stream=text)
+        stats.sort_stats('cumulative').print_stats(self.top)
+        with open(self._phase_path(name, '.txt'), 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+
+        hot_functions = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+        allocations = after.compare_to(before, 'lineno')[:self.top]
+
+        self.phases.append({
+            'fase': name,
+            'tempo_s': round(wall, 3),
+            'cpu_s': round(cpu, 3),
+            'memoria_atual_bytes': current,
+            'memoria_pico_bytes': peak,
+            'perfil': os.path.basename(prof_path),
+            'funcoes_mais_custosas': [
+                {
+                    'funcao': f"{os.path.basename(filename)}:{line}({function})",
+                    'chamadas': calls,
+                    'tempo_proprio_s': round(own_time, 4),
+                    'tempo_acumulado_s': round(cumulative, 4)
+                }
+                for (filename, line, function), (_, calls, own_time, cumulative, _) in hot_functions
+            ],
+            'maiores_alocacoes': [
+                {
+                    'local': str(stat.traceback[0]),
+                    'bytes': stat.size,
+                    'bytes_diferenca': stat.size_diff,
+                    'blocos_diferenca': stat.count_diff
+                }
+                for stat in allocations
+            ]
+        })
+        self.logger.info(f"🔬 Fase {name}: {wall:.2f}s ({cpu:.2f}s CPU), pico de memória {peak / 1024 / 1024:.1f} MB")
+
+    def write_summary(self) -> Optional[str]:
+        """Grava profile_summary.json e encerra o tracemalloc"""
+        if not self.enabled or not self.phases:
+            return None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        path = os.path.join(self.output_dir, 'profile_summary.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'fases': self.phases}, f, ensure_ascii=False, indent=2)
+
+        slowest = max(self.phases, key=lambda phase: phase['tempo_s'])
+        hungriest = max(self.phases, key=lambda phase: phase['memoria_pico_bytes'])
+        self.logger.info(f"🔬 Perfil salvo em {path} - fase mais lenta: {slowest['fase']} "
+                         f"({slowest['tempo_s']}s), maior pico de memória: {hungriest['fase']}")
+        return path
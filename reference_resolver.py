@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Resolução de referências do Liferay API Collector
+Reúne os ids referenciados pelos registros (autor, categorias, conteúdos
+relacionados, tipo de documento) durante toda a coleta e busca cada entidade
+única uma só vez, em lotes concorrentes, com cache LRU persistente
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from output_writers import iter_records
+
+# Endpoint de cada tipo de entidade referenciada
+ENTITY_ENDPOINTS = {
+    'user_accounts': '/o/headless-admin-user/v1.0/user-accounts/{id}',
+    'taxonomy_categories': '/o/headless-admin-taxonomy/v1.0/taxonomy-categories/{id}',
+    'structured_contents': '/o/headless-delivery/v1.0/structured-contents/{id}',
+    'documents': '/o/headless-delivery/v1.0/documents/{id}',
+    'blog_postings': '/o/headless-delivery/v1.0/blog-postings/{id}',
+}
+
+# Tipos que a própria coleta salva - lidos do arquivo de saída em vez da API
+LOCAL_COLLECTION_FILES = {
+    'structured_contents': 'structured_contents.json',
+    'documents': 'all_documents.json',
+}
+
+# contentType de relatedContents → tipo de entidade
+RELATED_CONTENT_TYPES = {
+    'StructuredContent': 'structured_contents',
+    'Document': 'documents',
+    'BlogPosting': 'blog_postings',
+}
+
+
+def extract_references(record: Dict) -> Iterable[tuple]:
+    """Pares (tipo, id) referenciados por um registro"""
+    creator = record.get('creator')
+    if isinstance(creator, dict) and creator.get('id') is not None:
+        yield 'user_accounts', creator['id']
+    for category in record.get('taxonomyCategoryBriefs') or []:
+        if category.get('taxonomyCategoryId') is not None:
+            yield 'taxonomy_categories', category['taxonomyCategoryId']
+    for related in record.get('relatedContents') or []:
+        kind = RELATED_CONTENT_TYPES.get(related.get('contentType'))
+        if kind and related.get('id') is not None:
+            yield kind, related['id']
+
+
+class EntityCache:
+    """
+    Cache LRU limitado de entidades, opcionalmente persistido em JSON.
+
+    Entradas mais antigas que `ttl` são descartadas na leitura; ao exceder
+    `max_entries`, saem as menos usadas recentemente. As chaves incluem o
+    `namespace` (URL do portal), então portais diferentes podem dividir o
+    mesmo arquivo.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10000, ttl: float = 86400,
+                 namespace: str = ''):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.namespace = namespace.rstrip('/')
+        self.entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, entry in stored:
+            self.entries[key] = entry
+        self._evict()
+
+    def make_key(self, kind: str, entity_id) -> str:
+        return f"{self.namespace}|{kind}:{entity_id}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry['fetched_at'] > self.ttl:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry['entity']
+
+    def put(self, key: str, entity: Dict):
+        self.entries[key] = {'fetched_at': time.time(), 'entity': entity}
+        self.entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        """Grava o cache de forma atômica (da menos para a mais recente)"""
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.references_', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(list(self.entries.items()), f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class ReferenceResolver:
+    """
+    Expande as referências de uma coleta inteira.
+
+    Os registros são registrados com `add_records` à medida que cada coleção
+    é salva; `resolve` busca então cada entidade única que não esteja no
+    cache, em lotes de `batch_size` requisições executadas por `workers`
+    threads. Conteúdos e documentos salvos nesta mesma coleta são lidos do
+    arquivo de saída. O tipo de documento vem embutido (sem id) em cada
+    documento e é apenas deduplicado pelo nome, sem requisições.
+    """
+
+    def __init__(self, collector, cache: Optional[EntityCache] = None, workers: int = 4,
+                 batch_size: int = 50, batch_delay: float = 0.5):
+        self.collector = collector
+        self.cache = cache or EntityCache()
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.logger = logging.getLogger(__name__)
+        self.pending: Dict[str, set] = {}
+        self.references = Counter()
+        self.document_types: Dict[str, Dict] = {}
+        self.document_type_uses = Counter()
+        self.summary: Dict[str, Dict] = {}
+
+    def add_records(self, records: Iterable[Dict]):
+        for record in records:
+            for kind, entity_id in extract_references(record):
+                self.references[kind] += 1
+                self.pending.setdefault(kind, set()).add(entity_id)
+            document_type = record.get('documentType')
+            if isinstance(document_type, dict) and document_type.get('name'):
+                self.document_types.setdefault(document_type['name'], document_type)
+                self.document_type_uses[document_type['name']] += 1
+
+    def _fetch(self, kind: str, entity_id) -> Optional[Dict]:
+        template = f"{self.collector.base_url}{ENTITY_ENDPOINTS[kind]}"
+        # Um disjuntor por tipo de entidade, não por id (cada id é uma URL diferente)
+        return self.collector.make_request(template.format(id=entity_id), breaker_key=template)
+
+    def _local_entities(self, kind: str, ids: List) -> Dict[str, Dict]:
+        """Entidades coletadas nesta execução (presentes no manifesto), lidas do arquivo"""
+        filename = LOCAL_COLLECTION_FILES.get(kind)
+        collected = self.collector.manifest.entities.get(kind, {})
+        wanted = {str(entity_id) for entity_id in ids if str(entity_id) in collected}
+        path = self.collector.output_writer.find(filename) if filename and wanted else None
+        if not path:
+            return {}
+        found = {}
+        for record in iter_records(path):
+            key = str(record.get('id'))
+            if key in wanted:
+                found[key] = record
+        return found
+
+    def resolve(self) -> Dict[str, List[Dict]]:
+        """Entidades referenciadas por tipo (uma requisição por entidade fora do cache)"""
+        resolved: Dict[str, List[Dict]] = {}
+
+        for kind in sorted(self.pending):
+            ids = sorted(self.pending[kind], key=str)
+            local = self._local_entities(kind, ids)
+            entities, missing = list(local.values()), []
+            hits = 0
+            for entity_id in ids:
+                if str(entity_id) in local:
+                    continue
+                entity = self.cache.get(self.cache.make_key(kind, entity_id))
+                if entity is None:
+                    missing.append(entity_id)
+                else:
+                    entities.append(entity)
+                    hits += 1
+
+            failures = 0
+            if missing:
+                self.logger.info(f"🔗 {kind}: {len(ids)} únicos ({self.references[kind]} referências), "
+                                 f"{len(local)} da coleta, {hits} em cache, buscando {len(missing)}")
+                if self.collector.replay is None:
+                    self.collector.ensure_authenticated()
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    for start in range(0, len(missing), self.batch_size):
+                        batch = missing[start:start + self.batch_size]
+                        for entity_id, entity in zip(batch, pool.map(lambda i: self._fetch(kind, i), batch)):
+                            if entity is None:
+                                failures += 1
+                                continue
+                            self.cache.put(self.cache.make_key(kind, entity_id), entity)
+                            entities.append(entity)
+                        if start + self.batch_size < len(missing) and self.collector.replay is None:
+                            time.sleep(self.batch_delay)  # Rate limiting entre lotes
+
+            resolved[kind] = entities
+            self.summary[kind] = {
+                'referencias': self.references[kind],
+                'unicos': len(ids),
+                'da_coleta': len(local),
+                'em_cache': hits,
+                'requisicoes': len(missing),
+                'falhas': failures
+            }
+
+        if self.document_types:
+            resolved['document_types'] = list(self.document_types.values())
+            self.summary['document_types'] = {
+                'referencias': sum(self.document_type_uses.values()),
+                'unicos': len(self.document_types),
+                'da_coleta': len(self.document_types),
+                'em_cache': 0,
+                'requisicoes': 0,
+                'falhas': 0,
+                'uso_por_tipo': dict(self.document_type_uses.most_common())
+            }
+
+        self.cache.save()
+        return resolved
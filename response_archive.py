@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Arquivo de respostas brutas do Liferay API Collector
+Guarda o corpo de cada resposta (com URL, parâmetros, headers e tempo) em
+segmentos gzip somente-acréscimo, e permite reprocessar a coleta sem rede
+"""
+
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+# Headers que nunca são gravados no arquivo
+REDACTED_HEADERS = {'authorization', 'cookie', 'set-cookie', 'x-csrf-token'}
+
+SEGMENT_PATTERN = 'responses-*.jsonl.gz'
+
+
+def request_key(url: str, params: Optional[Dict]) -> str:
+    """Chave canônica de uma requisição (URL + parâmetros ordenados)"""
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+    return json.dumps([url, items], ensure_ascii=False, separators=(',', ':'))
+
+
+def _safe_headers(headers) -> Dict[str, str]:
+    return {
+        name: value for name, value in dict(headers or {}).items()
+        if name.lower() not in REDACTED_HEADERS
+    }
+
+
+class ResponseArchive:
+    """
+    Grava respostas em segmentos `responses-<início>-<pid>.jsonl.gz`.
+
+    Cada entrada é um membro gzip independente acrescentado ao segmento
+    atual, então um processo interrompido não corrompe o que já foi gravado
+    e vários processos (um segmento cada) podem arquivar ao mesmo tempo.
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int = 64 * 1024 * 1024,
+                 compresslevel: int = 6):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.compresslevel = compresslevel
+        self._segment_path = None
+        self._lock = threading.Lock()
+
+    def _segment(self) -> str:
+        if self._segment_path is None or os.path.getsize(self._segment_path) >= self.segment_max_bytes:
+            os.makedirs(self.directory, exist_ok=True)
+            self._segment_path = os.path.join(
+                self.directory, f"responses-{time.time_ns()}-{os.getpid()}.jsonl.gz"
+            )
+            open(self._segment_path, 'ab').close()
+        return self._segment_path
+
+    def record(self, url: str, params: Optional[Dict], response, elapsed: float,
+               request_headers: Optional[Dict] = None):
+        """Acrescenta uma resposta ao arquivo"""
+        entry = {
+            'ts': time.time(),
+            'url': url,
+            'params': params or {},
+            'status': response.status_code,
+            'elapsed': round(elapsed, 4),
+            'request_headers': _safe_headers(request_headers),
+            'response_headers': _safe_headers(response.headers),
+            'body': response.text
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        member = gzip.compress(line.encode('utf-8'), compresslevel=self.compresslevel)
+        with self._lock, open(self._segment(), 'ab') as f:
+            f.write(member)
+
+
+def iter_archive(directory: str) -> Iterator[Dict]:
+    """Percorre todas as entradas do arquivo em ordem de gravação"""
+    for path in sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)),
+                       key=lambda p: int(os.path.basename(p).split('-')[1])):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class ArchiveReplay:
+    """
+    Responde requisições a partir do arquivo (modo offline).
+
+    Para cada URL + parâmetros vale a resposta 200 mais recente.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.logger = logging.getLogger(__name__)
+        self.responses: Dict[str, str] = {}
+        self.misses = 0
+        for entry in iter_archive(directory):
+            if entry.get('status') == 200:
+                self.responses[request_key(entry['url'], entry.get('params'))] = entry['body']
+        if not self.responses:
+            raise FileNotFoundError(f"Nenhuma resposta arquivada em {directory}")
+
+    def lookup(self, url: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        return self.fetch(url, params)[0]
+
+    def fetch(self, url: str, params: Optional[Dict] = None) -> Tuple[Optional[Dict], int]:
+        """Resposta arquivada e o tamanho do corpo em bytes"""
+        body = self.responses.get(request_key(url, params))
+        if body is None:
+            self.misses += 1
+            self.logger.warning(f"📭 Resposta não arquivada: {url} {params or ''}")
+            return None, 0
+        return json.loads(body), len(body.encode('utf-8'))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Manifesto de coleta do Liferay API Collector
+Mapeia tipo de entidade e id para um digest do registro, permitindo comparar
+duas coletas em tempo linear sem recarregar os arquivos completos
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+MANIFEST_VERSION = 1
+
+# Campos que mudam entre coletas sem alteração real do conteúdo
+VOLATILE_FIELDS = {'actions'}
+
+
+def record_id(record: Dict) -> Optional[str]:
+    """Identificador estável do registro (páginas do site só têm uuid)"""
+    value = record.get('id')
+    if value is None:
+        value = record.get('uuid')
+    return str(value) if value is not None else None
+
+
+def record_digest(record: Dict) -> str:
+    """Digest do registro sem os campos voláteis"""
+    stable = {key: value for key, value in record.items() if key not in VOLATILE_FIELDS}
+    payload = json.dumps(stable, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class RunManifest:
+    """Manifesto id → digest de uma coleta, agrupado por tipo de entidade"""
+
+    def __init__(self, entities: Optional[Dict[str, Dict[str, str]]] = None, generated_at: str = None):
+        self.entities = entities or {}
+        self.generated_at = generated_at
+
+    def add(self, entity_type: str, record: Dict):
+        key = record_id(record)
+        if key is not None:
+            self.entities.setdefault(entity_type, {})[key] = record_digest(record)
+
+    def add_all(self, entity_type: str, records: Iterable[Dict]):
+        """Substitui as entradas do tipo pelos registros informados"""
+        self.entities[entity_type] = {}
+        for record in records:
+            self.add(entity_type, record)
+
+    def to_dict(self) -> Dict:
+        return {
+            'versao': MANIFEST_VERSION,
+            'gerado_em': self.generated_at or datetime.now().isoformat(),
+            'entidades': self.entities
+        }
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+    @classmethod
+    def load(cls, path: str) -> 'RunManifest':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('entidades', {}), data.get('gerado_em'))
+
+
+def diff_manifests(old: RunManifest, new: RunManifest) -> Dict:
+    """
+    Compara dois manifestos em tempo linear.
+
+    Tipos presentes em apenas um dos manifestos (coleta parcial) são
+    listados em 'nao_comparados' em vez de aparecerem como removidos.
+    """
+    changes = {}
+    for entity_type in sorted(set(old.entities) & set(new.entities)):
+        old_ids = old.entities[entity_type]
+        new_ids = new.entities[entity_type]
+        changes[entity_type] = {
+            'adicionados': sorted(key for key in new_ids if key not in old_ids),
+            'removidos': sorted(key for key in old_ids if key not in new_ids),
+            'modificados': sorted(
+                key for key, digest in new_ids.items()
+                if key in old_ids and old_ids[key] != digest
+            )
+        }
+
+    return {
+        'de': old.generated_at,
+        'para': new.generated_at,
+        'alteracoes': changes,
+        'nao_comparados': sorted(set(old.entities) ^ set(new.entities)),
+        'resumo': {
+            entity_type: {kind: len(ids) for kind, ids in entity_changes.items()}
+            for entity_type, entity_changes in changes.items()
+        }
+    }
+
+
+def format_changelog(diff: Dict) -> str:
+    """Changelog legível a partir do resultado de diff_manifests"""
+    lines = [f"Alterações de {diff.get('de')} para {diff.get('para')}"]
+    symbols = {'adicionados': '+', 'removidos': '-', 'modificados': '~'}
+
+    for entity_type, entity_changes in diff['alteracoes'].items():
+        summary = diff['resumo'][entity_type]
+        lines.append(
+            f"\n[{entity_type}] +{summary['adicionados']} "
+            f"-{summary['removidos']} ~{summary['modificados']}"
+        )
+        for kind, symbol in symbols.items():
+            for key in entity_changes[kind]:
+                lines.append(f"  {symbol} {key}")
+
+    if diff['nao_comparados']:
+        lines.append(f"\nNão comparados (ausentes em uma das coletas): {', '.join(diff['nao_comparados'])}")
+    return "\n".join(lines)
+
+
+def changed_ids(diff: Dict, entity_type: str) -> List[str]:
+    """Ids a reprocessar (adicionados ou modificados) de um tipo"""
+    entity_changes = diff['alteracoes'].get(entity_type, {})
+    return entity_changes.get('adicionados', []) + entity_changes.get('modificados', [])
+
+
+def rotate_and_diff(output_dir: str, manifest: RunManifest) -> Optional[Dict]:
+    """
+    Grava o manifesto da coleta atual em output_dir.
+
+    O manifesto anterior vira manifest.previous.json e a diferença entre
+    os dois é salva em changes.json, que é retornado. Tipos não coletados
+    nesta execução são herdados do manifesto anterior.
+    """
+    path = os.path.join(output_dir, 'manifest.json')
+    previous_path = os.path.join(output_dir, 'manifest.previous.json')
+    diff = None
+
+    if os.path.exists(path):
+        os.replace(path, previous_path)
+        previous = RunManifest.load(previous_path)
+        diff = diff_manifests(previous, manifest)
+        with open(os.path.join(output_dir, 'changes.json'), 'w', encoding='utf-8') as f:
+            json.dump(diff, f, ensure_ascii=False, indent=2)
+
+        # Coleta parcial - manter os tipos que não foram coletados agora
+        for entity_type, entries in previous.entities.items():
+            manifest.entities.setdefault(entity_type, entries)
+
+    manifest.save(path)
+    return diff
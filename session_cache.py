@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Cache persistente de sessão autenticada do Liferay API Collector
+Guarda a estratégia vencedora, cookies, CSRF e token OAuth2 entre execuções
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows - sem lock entre processos
+    fcntl = None
+
+
+class SessionCache:
+    """
+    Armazena em disco o estado de autenticação de uma sessão.
+
+    Cada entrada é indexada por (base_url, username) e nunca contém a senha.
+    O arquivo é gravado de forma atômica com permissão 0600, então vários
+    processos de coleta podem compartilhá-lo com segurança.
+    """
+
+    # Margem para considerar um token expirado antes da hora (segundos)
+    EXPIRY_MARGIN = 60
+
+    def __init__(self, path: str, ttl: int = 1800):
+        self.path = path
+        self.ttl = ttl  # validade de sessões baseadas em cookies
+
+    @staticmethod
+    def make_key(base_url: str, username: str) -> str:
+        """Chave da entrada - hash para não expor o usuário no arquivo"""
+        raw = f"{base_url.rstrip('/')}|{username or ''}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _read_all(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_SH)
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_all(self, entries: Dict):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.session_', suffix='.tmp')
+        try:
+            os.chmod(tmp_path, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _locked_update(self, update):
+        """Lê, altera e regrava o arquivo sob lock exclusivo"""
+        lock_path = f"{self.path}.lock"
+        os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+        with open(lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = self._read_all()
+            update(entries)
+            self._write_all(entries)
+
+    def load(self, key: str) -> Optional[Dict]:
+        """Retorna a entrada em cache ou None se ausente/expirada"""
+        entry = self._read_all().get(key)
+        if not entry:
+            return None
+        if self.is_expired(entry) and not entry.get('oauth2', {}).get('refresh_token'):
+            return None
+        return entry
+
+    def save(self, key: str, entry: Dict):
+        """Grava a entrada, calculando a expiração da sessão"""
+        entry = dict(entry)
+        entry['saved_at'] = time.time()
+        if 'expires_at' not in entry:
+            oauth2 = entry.get('oauth2') or {}
+            entry['expires_at'] = oauth2.get('expires_at') or time.time() + self.ttl
+
+        def update(entries):
+            entries[key] = entry
+
+        self._locked_update(update)
+
+    def invalidate(self, key: str):
+        """Remove a entrada (ex.: sessão recusada pelo servidor)"""
+        def update(entries):
+            entries.pop(key, None)
+
+        self._locked_update(update)
+
+    @classmethod
+    def is_expired(cls, entry: Dict) -> bool:
+        expires_at = entry.get('expires_at')
+        return bool(expires_at) and time.time() >= expires_at - cls.EXPIRY_MARGIN
+
+    @staticmethod
+    def serialize_cookies(cookie_jar) -> list:
+        """Converte um RequestsCookieJar em lista serializável"""
+        return [
+            {
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'expires': cookie.expires,
+                'secure': cookie.secure
+            }
+            for cookie in cookie_jar
+        ]
+
+    @staticmethod
+    def restore_cookies(cookie_jar, cookies: list):
+        """Recarrega cookies serializados em um RequestsCookieJar"""
+        now = time.time()
+        for cookie in cookies or []:
+            if cookie.get('expires') and cookie['expires'] <= now:
+                continue
+            cookie_jar.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain'), path=cookie.get('path') or '/',
+                expires=cookie.get('expires'), secure=cookie.get('secure', False)
+            )
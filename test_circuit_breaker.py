@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Testes dos circuit breakers do Liferay API Collector
+"""
+
+import time
+import unittest
+
+from circuit_breaker import CircuitBreakerRegistry
+
+HOST = 'http://h'
+
+
+class CircuitBreakerRegistryTest(unittest.TestCase):
+
+    def _trip_host(self, registry):
+        for endpoint in ('/a', '/b'):
+            self.assertTrue(registry.allow(HOST + endpoint))
+            registry.record_failure(HOST + endpoint, 'HTTP 503', host_failure=True)
+        self.assertFalse(registry.allow(HOST + '/c'))
+        time.sleep(0.06)
+
+    def test_host_probe_answered_with_4xx_closes_host(self):
+        registry = CircuitBreakerRegistry(failure_threshold=5, host_failure_threshold=2, reset_timeout=0.05)
+        self._trip_host(registry)
+
+        self.assertTrue(registry.allow(HOST + '/probe'))
+        registry.record_failure(HOST + '/probe', 'HTTP 404', host_failure=False)
+
+        # O host respondeu: demais endpoints voltam a ser liberados
+        self.assertTrue(registry.allow(HOST + '/c'))
+        self.assertTrue(registry.allow(HOST + '/d'))
+
+    def test_host_probe_with_network_failure_reopens(self):
+        registry = CircuitBreakerRegistry(failure_threshold=5, host_failure_threshold=2, reset_timeout=0.05)
+        self._trip_host(registry)
+
+        self.assertTrue(registry.allow(HOST + '/probe'))
+        self.assertFalse(registry.allow(HOST + '/c'))  # uma sondagem por vez
+        registry.record_failure(HOST + '/probe', 'ConnectionError', host_failure=True)
+        self.assertFalse(registry.allow(HOST + '/c'))
+
+    def test_explicit_key_groups_entity_urls(self):
+        registry = CircuitBreakerRegistry(failure_threshold=2)
+        template = HOST + '/user-accounts/{id}'
+        for entity_id in (1, 2):
+            url = template.format(id=entity_id)
+            self.assertTrue(registry.allow(url, key=template))
+            registry.record_failure(url, 'HTTP 403', host_failure=False, key=template)
+
+        self.assertFalse(registry.allow(template.format(id=3), key=template))
+        self.assertGreater(registry.retry_after(template.format(id=3), key=template), 0)
+        self.assertEqual(list(registry.report()['endpoints']), [template])
+        self.assertTrue(registry.allow(HOST + '/user-accounts/3'))  # sem chave: disjuntor da URL
+
+    def test_budget_reset(self):
+        registry = CircuitBreakerRegistry(failure_budget=1)
+        registry.record_failed_request()
+        self.assertFalse(registry.allow(HOST + '/a'))
+        registry.reset_budget()
+        self.assertTrue(registry.allow(HOST + '/a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Testes da leitura com acesso aleatório do Liferay API Collector
+"""
+
+import os
+import tempfile
+import unittest
+
+from collection_reader import CollectionReader, index_path
+from output_writers import OutputWriter
+
+RECORDS = [
+    {'id': 1, 'title': 'aaa', 'documentFolderId': 10, 'dateModified': '2025-01-01T00:00:00Z'},
+    {'id': 22, 'title': 'b', 'documentFolderId': 20, 'dateModified': '2025-06-01T00:00:00Z'},
+]
+# Mesmo tamanho em bytes, registros em outra ordem
+REORDERED = [RECORDS[1], RECORDS[0]]
+
+
+class CollectionReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_dir = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_and_filters(self):
+        path = OutputWriter(self.output_dir).write_collection('all_documents.json', RECORDS)
+        with CollectionReader(path) as reader:
+            self.assertEqual(len(reader), 2)
+            self.assertEqual(reader.get(22), RECORDS[1])
+            self.assertIsNone(reader.get(3))
+            self.assertEqual(list(reader.iter(folder_id=10)), [RECORDS[0]])
+            self.assertEqual(list(reader.iter(modified_after='2025-03-01')), [RECORDS[1]])
+
+    def test_rewrite_without_index_removes_stale_index(self):
+        path = OutputWriter(self.output_dir).write_collection('all_documents.json', RECORDS)
+        OutputWriter(self.output_dir, index=False).write_collection('all_documents.json', REORDERED)
+        self.assertFalse(os.path.exists(index_path(path)))
+
+        with CollectionReader(path) as reader:
+            self.assertEqual(reader.get(1), RECORDS[0])
+            self.assertEqual(list(reader), REORDERED)
+
+    def test_same_size_rewrite_invalidates_index(self):
+        path = OutputWriter(self.output_dir).write_collection('all_documents.json', RECORDS)
+        size = os.path.getsize(path)
+        stale_index = index_path(path) + '.old'
+        os.rename(index_path(path), stale_index)
+
+        OutputWriter(self.output_dir).write_collection('all_documents.json', REORDERED)
+        self.assertEqual(os.path.getsize(path), size)
+        os.replace(stale_index, index_path(path))  # índice da versão anterior
+
+        with self.assertRaises(FileNotFoundError):
+            CollectionReader(path, build_missing_index=False)
+        with CollectionReader(path) as reader:
+            self.assertEqual(reader.get(1), RECORDS[0])
+            self.assertEqual(reader.get(22), RECORDS[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Testes do planejador de coleta do Liferay API Collector
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from crawl_planner import DEFAULT_REQUEST_LATENCY, CrawlPlanner
+from output_writers import OutputWriter
+
+PAGE_SIZES = {'structured_contents': 20, 'content_folders': 20, 'site_pages': 20,
+              'document_folders': 20, 'documents': 20}
+ALL = {collection: True for collection in PAGE_SIZES}
+
+
+class CrawlPlannerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_dir = self.directory.name
+        # Última execução: apenas --structured-contents --site-pages
+        self.write_json('summary_report.json', {
+            'duracao_total': '0:00:12.000000',
+            'estatisticas': {'conteudos_estruturados': 40, 'pastas_de_conteudo': 0, 'paginas_do_site': 20,
+                             'pastas_de_documentos': 0, 'documentos': 0},
+            'configuracao': {'modo_offline': False, 'csrf_token_obtido': True}
+        })
+        # Pastas de documentos de uma coleta anterior
+        folders = [{'id': i, 'numberOfDocuments': 3} for i in range(36)]
+        OutputWriter(self.output_dir).write_collection('document_folders.json', folders)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_json(self, filename, data):
+        with open(os.path.join(self.output_dir, filename), 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def plan(self):
+        return CrawlPlanner(self.output_dir, PAGE_SIZES, rate_limit_delay=0.5).build_plan(ALL)
+
+    def test_unselected_collections_fall_back_to_output_files(self):
+        collections = self.plan()['coletas']
+        self.assertEqual(collections['structured_contents']['registros'], 40)
+        self.assertEqual(collections['document_folders']['registros'], 36)
+        self.assertEqual(collections['document_folders']['paginas'], 2)
+        self.assertEqual(collections['document_folders']['origem'], 'document_folders.json')
+        self.assertGreater(collections['document_folders']['bytes_estimados'], 0)
+        self.assertEqual(collections['documents']['registros'], 108)
+        self.assertIsNone(collections['content_folders']['registros'])
+
+    def test_manifest_counts(self):
+        self.write_json('manifest.json', {'entidades': {'content_folders': {'1': 'a', '2': 'b'}}})
+        collections = self.plan()['coletas']
+        self.assertEqual(collections['content_folders']['registros'], 2)
+        self.assertEqual(collections['content_folders']['origem'], 'manifest.json')
+
+    def test_latency_uses_only_collections_of_last_run(self):
+        # 3 páginas: 12s - 3 * 0.5s de rate limit = 10.5s de rede
+        self.assertEqual(self.plan()['latencia_por_requisicao'], 3.5)
+
+    def test_offline_summary_is_ignored_for_latency(self):
+        self.write_json('summary_report.json', {
+            'duracao_total': '0:00:00.010000',
+            'estatisticas': {'conteudos_estruturados': 40},
+            'configuracao': {'modo_offline': True}
+        })
+        self.assertEqual(self.plan()['latencia_por_requisicao'], DEFAULT_REQUEST_LATENCY)
+
+
+if __name__ == '__main__':
+    unittest.main()
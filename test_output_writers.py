@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Testes da camada de saída do Liferay API Collector
+"""
+
+import os
+import stat
+import tempfile
+import unittest
+
+from output_writers import OutputWriter, load_collection
+
+RECORDS = [{'id': 1, 'title': 'um'}, {'id': 2, 'title': 'dois'}]
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+class OutputWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_dir = self.directory.name
+        self.umask = os.umask(0o022)
+
+    def tearDown(self):
+        os.umask(self.umask)
+        self.directory.cleanup()
+
+    def test_new_file_follows_umask(self):
+        path = OutputWriter(self.output_dir).write_collection('site_pages.json', RECORDS)
+        self.assertEqual(mode(path), 0o644)
+        self.assertEqual(load_collection(path), RECORDS)
+
+    def test_rewrite_keeps_existing_mode(self):
+        writer = OutputWriter(self.output_dir)
+        path = writer.write_collection('site_pages.json', RECORDS)
+        os.chmod(path, 0o640)
+        writer.write_collection('site_pages.json', RECORDS[:1])
+        self.assertEqual(mode(path), 0o640)
+
+    def test_compressed_output_replaces_other_variants(self):
+        plain = OutputWriter(self.output_dir).write_collection('site_pages.json', RECORDS)
+        writer = OutputWriter(self.output_dir, compression='gzip')
+        compressed = writer.write_collection('site_pages.json', RECORDS)
+
+        self.assertFalse(os.path.exists(plain))
+        self.assertFalse(os.path.exists(plain + '.idx'))
+        self.assertEqual(writer.find('site_pages.json'), compressed)
+        self.assertEqual(mode(compressed), 0o644)
+        self.assertEqual(load_collection(compressed), RECORDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
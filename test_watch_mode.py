@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Testes do modo watch do Liferay API Collector
+"""
+
+import tempfile
+import unittest
+
+from output_writers import OutputWriter, load_collection
+from watch_mode import SourceWatcher
+
+SECOND = '2025-05-01T10:00:00Z'
+
+
+class RemoteCollector:
+    """Coletor falso: `remote` é a coleção no portal, ordenada por dateModified decrescente"""
+
+    def __init__(self, output_dir, remote):
+        self.output_dir = output_dir
+        self.output_writer = OutputWriter(output_dir)
+        self.remote = remote
+        self.failed_sources = []
+
+    def collection_endpoint(self, collection, folder_id=None):
+        return f"/{collection}"
+
+    def fetch_page(self, endpoint, page, page_size=20, sort=None):
+        items = sorted(self.remote, key=lambda item: item['dateModified'], reverse=True)
+        return {'items': items[(page - 1) * page_size:page * page_size], 'totalCount': len(items),
+                'lastPage': max(1, -(-len(items) // page_size))}
+
+    def store_collection(self, collection, records):
+        self.output_writer.write_collection(f"{collection}.json", records)
+
+
+class SourceWatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_dir = self.directory.name
+        self.local = [
+            {'id': 1, 'title': 'a', 'dateModified': SECOND},
+            {'id': 2, 'title': 'b', 'dateModified': '2025-04-01T00:00:00Z'},
+        ]
+        OutputWriter(self.output_dir).write_collection('site_pages.json', self.local)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def poll(self, remote):
+        collector = RemoteCollector(self.output_dir, remote)
+        watcher = SourceWatcher(collector, page_sizes={'site_pages': 1},
+                                collect_options={'site_pages': True})
+        source = watcher.sources()[0]
+        return watcher.poll(source)
+
+    def test_unchanged_records_in_last_second_are_ignored(self):
+        self.assertFalse(self.poll(list(self.local)))
+
+    def test_change_in_same_second_as_last_seen_is_applied(self):
+        edited = {'id': 2, 'title': 'b editado', 'dateModified': SECOND}
+        self.assertTrue(self.poll([self.local[0], edited]))
+
+        stored = load_collection(f"{self.output_dir}/site_pages.json")
+        self.assertEqual(stored, [self.local[0], edited])
+
+
+if __name__ == '__main__':
+    unittest.main()
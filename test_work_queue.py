@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Testes da fila de trabalho do Liferay API Collector
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from circuit_breaker import CircuitBreakerRegistry
+from work_queue import (STATUS_DONE, STATUS_FAILED, STATUS_LEASED, STATUS_PENDING, TASK_PAGE,
+                        CrawlWorker, WorkQueue, seed_collection_tasks)
+
+HOST = 'http://h'
+OPTIONS = {'structured_contents': False, 'content_folders': False, 'site_pages': True,
+           'document_folders': False, 'documents': False}
+
+
+class PageSampler:
+
+    def record_page(self, *args, **kwargs):
+        pass
+
+
+class PagedCollector:
+    """Coletor falso: cada endpoint tem `last_page` páginas de 2 itens"""
+    base_url = HOST
+    last_request_rejected = False
+    last_request_latency = 0.0
+
+    def __init__(self, last_page=2):
+        self.last_page = last_page
+        self.page_sampler = PageSampler()
+        self.requests = []
+
+    def collection_endpoint(self, collection, folder_id=None):
+        return f"/{collection}"
+
+    def fetch_page(self, endpoint, page, page_size=20, sort=None):
+        self.requests.append((endpoint, page))
+        return {'items': [{'id': page * 10 + i} for i in range(2)], 'lastPage': self.last_page}
+
+
+class RefusingCollector:
+    """Coletor cujas requisições são todas recusadas pelo circuit breaker"""
+    base_url = HOST
+    last_request_rejected = True
+
+    def __init__(self, registry):
+        self.circuit_breakers = registry
+
+    def fetch_page(self, endpoint, page, page_size=20, sort=None):
+        return None
+
+
+class WorkQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'queue.sqlite')
+        self.queue = WorkQueue(self.path)
+
+    def tearDown(self):
+        self.queue.close()
+        self.directory.cleanup()
+
+    def statuses(self):
+        return [(row['status'], row['attempts'])
+                for row in self.queue.conn.execute('SELECT status, attempts FROM tasks ORDER BY id')]
+
+    def test_dedupe_key(self):
+        self.assertIsNotNone(self.queue.enqueue(TASK_PAGE, {'page': 1}, dedupe_key='k'))
+        self.assertIsNone(self.queue.enqueue(TASK_PAGE, {'page': 1}, dedupe_key='k'))
+        self.assertIsNotNone(self.queue.enqueue(TASK_PAGE, {'page': 2}, dedupe_key='outra'))
+        self.assertEqual(self.queue.counts()[STATUS_PENDING], 2)
+
+    def test_expired_lease_is_taken_over(self):
+        self.queue.enqueue(TASK_PAGE, {'page': 1})
+        first = self.queue.lease('w1', lease_seconds=0.05)
+        self.assertIsNone(self.queue.lease('w2'))
+
+        time.sleep(0.06)
+        second = self.queue.lease('w2')
+        self.assertEqual(second['id'], first['id'])
+        self.assertEqual(second['attempts'], 2)
+        self.assertFalse(self.queue.ack(first['id'], 'w1', []))
+        self.assertTrue(self.queue.ack(second['id'], 'w2', []))
+
+    def test_expired_lease_without_attempts_left_fails(self):
+        self.queue.enqueue(TASK_PAGE, {'page': 1}, max_attempts=1)
+        self.queue.lease('w1', lease_seconds=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.queue.lease('w2'))
+        self.assertEqual(self.statuses(), [(STATUS_FAILED, 1)])
+
+    def test_nack_retries_then_fails(self):
+        self.queue.enqueue(TASK_PAGE, {'page': 1}, max_attempts=2)
+        task = self.queue.lease('w1')
+        self.queue.nack(task['id'], 'w1', 'HTTP 500', retry_delay=0)
+        self.assertEqual(self.statuses(), [(STATUS_PENDING, 1)])
+
+        task = self.queue.lease('w1')
+        self.queue.nack(task['id'], 'w1', 'HTTP 500', retry_delay=0)
+        self.assertEqual(self.statuses(), [(STATUS_FAILED, 2)])
+        self.assertIsNone(self.queue.lease('w1'))
+        self.assertEqual(self.queue.failed_tasks()[0]['error'], 'HTTP 500')
+
+        self.assertEqual(self.queue.retry_failed(), 1)
+        self.assertEqual(self.statuses(), [(STATUS_PENDING, 0)])
+
+    def test_release_does_not_spend_attempt(self):
+        self.queue.enqueue(TASK_PAGE, {'page': 1})
+        task = self.queue.lease('w1')
+        self.assertEqual(self.statuses(), [(STATUS_LEASED, 1)])
+        self.assertTrue(self.queue.release(task['id'], 'w1'))
+        self.assertEqual(self.statuses(), [(STATUS_PENDING, 0)])
+
+    def test_crawl_follows_pages(self):
+        collector = PagedCollector(last_page=3)
+        self.assertEqual(seed_collection_tasks(self.queue, collector, OPTIONS, {}), 1)
+        CrawlWorker(self.queue, collector, poll_interval=0).run()
+
+        self.assertEqual(sorted(collector.requests), [('/site_pages', 1), ('/site_pages', 2), ('/site_pages', 3)])
+        self.assertEqual(self.queue.counts()[STATUS_DONE], 3)
+
+    def test_seeding_unfinished_queue_resumes_crawl(self):
+        collector = PagedCollector()
+        seed_collection_tasks(self.queue, collector, OPTIONS, {})
+        self.assertEqual(seed_collection_tasks(self.queue, collector, OPTIONS, {}), 0)
+        self.assertEqual(self.queue.generation, 1)
+        self.assertEqual(self.queue.counts()[STATUS_PENDING], 1)
+
+    def test_reseeding_drained_queue_starts_new_crawl(self):
+        collector = PagedCollector()
+        seed_collection_tasks(self.queue, collector, OPTIONS, {})
+        CrawlWorker(self.queue, collector, poll_interval=0).run()
+        self.queue.close()
+
+        # Coleta seguinte (ex.: cron diário) reaproveitando o arquivo
+        self.queue = WorkQueue(self.path)
+        collector = PagedCollector()
+        self.assertEqual(seed_collection_tasks(self.queue, collector, OPTIONS, {}), 1)
+        self.assertEqual(self.queue.generation, 2)
+        self.assertEqual(self.queue.done_tasks([TASK_PAGE]), [])
+
+        CrawlWorker(self.queue, collector, poll_interval=0).run()
+        self.assertEqual(len(collector.requests), 2)
+        self.assertEqual(self.queue.counts()[STATUS_DONE], 2)
+        self.assertEqual(self.queue.conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0], 2)
+
+    def test_refused_tasks_are_released_without_spending_attempts(self):
+        for page in range(1, 4):
+            self.queue.enqueue(TASK_PAGE, {'collection': 'site_pages', 'endpoint': '/p', 'page': page,
+                                           'page_size': 10})
+        registry = CircuitBreakerRegistry(failure_budget=1)
+        registry.record_failed_request()
+
+        worker = CrawlWorker(self.queue, RefusingCollector(registry), poll_interval=0)
+        worker.run(max_tasks=3)
+
+        self.assertEqual(self.statuses(), [(STATUS_PENDING, 0)] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Modo watch do Liferay API Collector
+Processo contínuo que mantém a sessão aberta e consulta cada coleção/pasta
+em um intervalo próprio, adaptado à frequência real de alterações
+(histórico de dateModified), aplicando as mudanças de forma incremental
+"""
+
+import json
+import logging
+import os
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from collection_reader import parse_timestamp
+from output_writers import load_collection
+from run_manifest import record_digest, record_id, rotate_and_diff
+
+WATCHED_COLLECTIONS = ('structured_contents', 'content_folders', 'site_pages', 'document_folders')
+
+SORT_NEWEST_FIRST = 'dateModified:desc'
+
+# Quantas datas de alteração guardar por fonte para estimar a frequência
+HISTORY_SIZE = 20
+
+# Alterações mais próximas que isso (segundos) formam um único evento
+BATCH_WINDOW = 3600
+
+# Fração do intervalo típico entre alterações usada como intervalo de consulta
+INTERVAL_FRACTION = 0.25
+
+
+class SourceWatcher:
+    """
+    Agenda e aplica as consultas incrementais de cada fonte.
+
+    Uma fonte é uma coleção do site ou a listagem de documentos de uma pasta.
+    Cada consulta busca a primeira página ordenada por dateModified
+    decrescente; enquanto houver registros modificados a partir da última
+    alteração vista (inclusive), as páginas seguintes são lidas, e só os que
+    diferem da cópia local contam como alterados. Se o
+    totalCount não bater com o esperado (remoções), a fonte é recoletada.
+    """
+
+    def __init__(self, collector, page_sizes: Dict[str, int], min_interval: float = 120,
+                 max_interval: float = 86400, backoff: float = 1.5, state_file: str = 'watch_state.json',
+                 collect_options: Optional[Dict[str, bool]] = None):
+        self.collector = collector
+        options = collect_options or {collection: True for collection in WATCHED_COLLECTIONS + ('documents',)}
+        self.collections = [collection for collection in WATCHED_COLLECTIONS if options.get(collection)]
+        self.watch_documents = bool(options.get('documents'))
+        self.page_sizes = page_sizes
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.state_path = os.path.join(collector.output_dir, state_file)
+        self.logger = logging.getLogger(__name__)
+        self.state: Dict[str, Dict] = self._load_state()
+        self.folders: Dict[int, Dict] = {}
+        self.documents_dirty = False
+
+    # ------------------------------------------------------------------
+    # Estado persistido
+    # ------------------------------------------------------------------
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self):
+        os.makedirs(self.collector.output_dir, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    # ------------------------------------------------------------------
+    # Fontes e registros locais
+    # ------------------------------------------------------------------
+    def _source_key(self, collection: str, folder_id=None) -> str:
+        return f"documents:{folder_id}" if collection == 'documents' else collection
+
+    def _source_filename(self, collection: str, folder: Optional[Dict] = None) -> str:
+        if collection == 'documents':
+            return self.collector.folder_documents_filename(folder)
+        return f"{collection}.json"
+
+    def _load_local(self, filename: str) -> List[Dict]:
+        path = self.collector.output_writer.find(filename)
+        return load_collection(path) if path else []
+
+    def sources(self) -> List[Dict]:
+        """Coleções do site mais uma fonte por pasta de documentos conhecida"""
+        sources = [
+            {'key': collection, 'collection': collection, 'folder': None,
+             'endpoint': self.collector.collection_endpoint(collection)}
+            for collection in self.collections
+        ]
+        if not self.watch_documents:
+            return sources
+        for folder in self.folders.values():
+            sources.append({
+                'key': self._source_key('documents', folder['id']), 'collection': 'documents',
+                'folder': folder, 'endpoint': self.collector.collection_endpoint('documents', folder['id'])
+            })
+        return sources
+
+    def _refresh_folders(self, folders: List[Dict]):
+        self.folders = {
+            folder['id']: {'id': folder['id'], 'name': folder.get('name', f"Pasta_{folder['id']}")}
+            for folder in folders if folder.get('id') is not None
+        }
+
+    # ------------------------------------------------------------------
+    # Intervalo adaptativo
+    # ------------------------------------------------------------------
+    def _history_interval(self, history: List[int]) -> float:
+        """
+        Intervalo a partir do espaçamento típico entre alterações.
+
+        O tempo desde a última alteração entra como mais um intervalo, então
+        fontes paradas há muito tempo são consultadas com menos frequência.
+        """
+        if not history:
+            return self.min_interval
+        # Alterações em lote (ex.: upload de vários arquivos) contam como uma só
+        events = []
+        for ts in sorted(history):
+            if not events or ts - events[-1] > BATCH_WINDOW:
+                events.append(ts)
+        events.append(time.time())
+        gaps = [b - a for a, b in zip(events, events[1:]) if b > a]
+        if not gaps:
+            return self.min_interval
+        return self._clamp(statistics.median(gaps) * INTERVAL_FRACTION)
+
+    def _clamp(self, interval: float) -> float:
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def _init_source_state(self, source: Dict, records: List[Dict]) -> Dict:
+        modified = sorted(
+            ts for ts in (parse_timestamp(record.get('dateModified')) for record in records) if ts > 0
+        )[-HISTORY_SIZE:]
+        interval = self._history_interval(modified)
+        return {
+            'last_modified': modified[-1] if modified else None,
+            'total_count': len(records),
+            'history': modified,
+            'interval': interval,
+            'next_poll': time.time()
+        }
+
+    def _reschedule(self, state: Dict, changed: bool, failed: bool = False):
+        if failed:
+            state['interval'] = self._clamp(state['interval'] * self.backoff * 2)
+        elif changed:
+            target = self._history_interval(state['history'])
+            state['interval'] = self._clamp(min(state['interval'] / 2, target))
+        else:
+            state['interval'] = self._clamp(state['interval'] * self.backoff)
+        state['next_poll'] = time.time() + state['interval']
+
+    # ------------------------------------------------------------------
+    # Consulta incremental
+    # ------------------------------------------------------------------
+    def _fetch_changes(self, source: Dict, state: Dict, records: List[Dict]) -> Optional[Dict]:
+        """Registros alterados desde a última consulta e o totalCount atual"""
+        page_size = self.page_sizes.get(source['collection'], 20)
+        last_modified = state.get('last_modified') or 0
+        # dateModified tem resolução de segundos: o próprio segundo da última
+        # mudança vista é consultado de novo e as cópias idênticas descartadas
+        local_digests = {record_id(record): record_digest(record) for record in records}
+        changed = []
+        page = 1
+
+        while True:
+            data = self.collector.fetch_page(source['endpoint'], page, page_size, sort=SORT_NEWEST_FIRST)
+            if not data:
+                return None
+            items = data.get('items', [])
+            recent = [item for item in items if parse_timestamp(item.get('dateModified')) >= last_modified]
+            changed.extend(item for item in recent
+                           if local_digests.get(record_id(item)) != record_digest(item))
+            if page == 1:
+                total_count = data.get('totalCount', 0)
+            if len(recent) < len(items) or page >= data.get('lastPage', 1):
+                break
+            page += 1
+
+        return {'changed': changed, 'total_count': total_count}
+
+    def _full_refresh(self, source: Dict) -> Optional[List[Dict]]:
+        """Recoleta a fonte inteira; None se alguma página falhar (lista parcial)"""
+        records = self.collector.collect_paginated_data(
+            source['endpoint'], source['key'], page_size=self.page_sizes.get(source['collection'], 20)
+        )
+        if source['endpoint'] in self.collector.failed_sources:
+            return None
+        return records
+
+    def poll(self, source: Dict) -> bool:
+        """Consulta uma fonte e aplica as mudanças; retorna True se algo mudou"""
+        filename = self._source_filename(source['collection'], source['folder'])
+        records = self._load_local(filename)
+        state = self.state.get(source['key'])
+        if state is None:
+            state = self.state[source['key']] = self._init_source_state(source, records)
+
+        result = self._fetch_changes(source, state, records)
+        if result is None:
+            self.logger.warning(f"⚠️ Falha ao consultar {source['key']} - nova tentativa mais tarde")
+            self._reschedule(state, changed=False, failed=True)
+            return False
+
+        changed = result['changed']
+        by_id = {record_id(record): position for position, record in enumerate(records)}
+        new_ids = {record_id(item) for item in changed if record_id(item) not in by_id}
+        expected_total = len(records) + len(new_ids)
+
+        if not changed and result['total_count'] == len(records):
+            self._reschedule(state, changed=False)
+            return False
+
+        if result['total_count'] != expected_total:
+            # Remoções (ou divergência) - recoletar a fonte inteira
+            self.logger.info(f"🔁 {source['key']}: totalCount {result['total_count']} ≠ {expected_total} "
+                             f"- recoletando fonte")
+            records = self._full_refresh(source)
+            if records is None:
+                # Manter o arquivo atual em vez de gravar a lista parcial
+                self.logger.warning(f"⚠️ Falha ao recoletar {source['key']} - arquivo atual mantido")
+                self._reschedule(state, changed=False, failed=True)
+                return False
+        else:
+            for item in changed:
+                position = by_id.get(record_id(item))
+                if position is None:
+                    records.append(item)
+                else:
+                    records[position] = item
+            self.logger.info(f"🆕 {source['key']}: {len(changed)} registro(s) alterado(s), "
+                             f"{len(new_ids)} novo(s)")
+
+        self._store(source, records)
+
+        for item in changed:
+            ts = parse_timestamp(item.get('dateModified'))
+            if ts > 0:
+                state['history'].append(ts)
+        state['history'] = sorted(set(state['history']))[-HISTORY_SIZE:]
+        if state['history']:
+            state['last_modified'] = state['history'][-1]
+        state['total_count'] = len(records)
+        self._reschedule(state, changed=True)
+        return True
+
+    def _store(self, source: Dict, records: List[Dict]):
+        if source['collection'] == 'documents':
+            self.collector.save_folder_documents(source['folder'], records)
+            self.documents_dirty = True
+        else:
+            self.collector.store_collection(source['collection'], records)
+            if source['collection'] == 'document_folders':
+                self._refresh_folders(records)
+
+    def _rebuild_all_documents(self):
+        """Regrava all_documents.json a partir dos arquivos de cada pasta"""
+        all_documents = []
+        for folder in self.folders.values():
+            all_documents.extend(self._load_local(self.collector.folder_documents_filename(folder)))
+        self.collector.store_documents(all_documents)
+
+    # ------------------------------------------------------------------
+    # Laço principal
+    # ------------------------------------------------------------------
+    def _prime(self):
+        """Carrega pastas e contagens locais para não zerar o relatório"""
+        self._refresh_folders(self._load_local('document_folders.json'))
+        if self.watch_documents and not self.folders and 'document_folders' not in self.collections:
+            self.logger.warning("⚠️ Nenhuma pasta de documentos conhecida - inclua --document-folders")
+        for collection in WATCHED_COLLECTIONS:
+            self.collector.stats[collection] = len(self._load_local(f"{collection}.json"))
+        self.collector.stats['documents'] = len(self._load_local('all_documents.json'))
+
+    def run(self, max_cycles: Optional[int] = None):
+        """Consulta as fontes vencidas até ser interrompido (ou max_cycles)"""
+        self._prime()
+        if not self.sources():
+            self.logger.error("❌ Nenhuma fonte para acompanhar - encerrando modo watch")
+            return
+        self.logger.info(f"👀 Modo watch iniciado com {len(self.sources())} fontes")
+        cycles = 0
+
+        while max_cycles is None or cycles < max_cycles:
+            now = time.time()
+            due = [s for s in self.sources()
+                   if self.state.get(s['key'], {}).get('next_poll', 0) <= now]
+
+            if not due:
+                next_poll = min(self.state[s['key']]['next_poll'] for s in self.sources())
+                time.sleep(max(0.0, min(next_poll - now, self.max_interval)))
+                continue
+
+            # Orçamento de falhas vale por ciclo - um processo contínuo o esgotaria
+            self.collector.circuit_breakers.reset_budget()
+            self.documents_dirty = False
+            changed = [source['key'] for source in due if self.poll(source)]
+
+            if self.documents_dirty:
+                self._rebuild_all_documents()
+            if changed:
+                self.write_report(changed)
+                self.logger.info(f"✅ Ciclo {cycles + 1}: alterações em {', '.join(changed)}")
+
+            self.save_state()
+            cycles += 1
+
+    def write_report(self, changed: List[str]):
+        """
+        Grava watch_report.json (e atualiza o manifesto/changes.json).
+
+        O summary_report.json continua sendo o da última coleta completa: a
+        duração e o perfil dos dados de um processo contínuo não servem de
+        base para o --plan.
+        """
+        os.makedirs(self.collector.output_dir, exist_ok=True)
+        now = datetime.now()
+        self.collector.manifest.generated_at = now.isoformat()
+        changes = rotate_and_diff(self.collector.output_dir, self.collector.manifest)
+        report = {
+            'atualizado_em': now.isoformat(),
+            'fontes_alteradas': changed,
+            'estatisticas': {key: value for key, value in self.collector.stats.items() if key != 'start_time'},
+            'alteracoes': changes['resumo'] if changes else None,
+            'fontes_com_falha': self.collector.failed_sources,
+            'agendamento': self.schedule()
+        }
+        path = os.path.join(self.collector.output_dir, 'watch_report.json')
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def schedule(self) -> List[Dict]:
+        """Resumo do agendamento atual (para exibição)"""
+        return [
+            {
+                'fonte': key,
+                'intervalo_s': round(state['interval']),
+                'proxima_consulta': datetime.fromtimestamp(state['next_poll']).isoformat(timespec='seconds')
+            }
+            for key, state in sorted(self.state.items(), key=lambda item: item[1]['interval'])
+        ]
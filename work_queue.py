@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Fila de trabalho durável do Liferay API Collector
+Divide a coleta em tarefas (página de endpoint, listagem de pasta, download de
+arquivo) numa fila SQLite que vários processos - na mesma máquina ou em hosts
+que compartilham o arquivo - consomem com lease, timeout e retentativas
+
+Entre hosts (arquivo em NFS/SMB) a fila usa journal de rollback (DELETE):
+WAL exige memória compartilhada e só funciona com todos os processos no
+mesmo host. O lock de arquivo do sistema de rede precisa ser confiável.
+
+Cada coleta é uma geração da fila: enfileirar sobre uma fila já esgotada
+inicia uma nova geração (descartando a anterior), então o mesmo arquivo
+pode ser reaproveitado por uma coleta diária sem remontar a coleta antiga.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from circuit_breaker import CircuitOpenError
+
+TASK_PAGE = 'page'
+TASK_FOLDER = 'folder'
+TASK_DOWNLOAD = 'download'
+
+STATUS_PENDING = 'pending'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    generation INTEGER NOT NULL DEFAULT 1,
+    dedupe_key TEXT UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (generation, status, available_at);
+CREATE TABLE IF NOT EXISTS queue_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class WorkQueue:
+    """
+    Fila de tarefas persistida em SQLite.
+
+    Uma tarefa arrendada (`lease`) fica invisível para os outros workers até
+    ser confirmada (`ack`), devolvida (`nack`) ou até o lease expirar - nesse
+    caso outro worker a retoma. Após `max_attempts` tentativas ela é marcada
+    como falha.
+
+    Todas as operações valem para a geração atual (`generation`); chaves de
+    deduplicação são únicas apenas dentro de uma geração.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0, journal_mode: str = 'DELETE'):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        # WAL só com todos os workers no mesmo host; DELETE funciona em arquivo compartilhado
+        self.conn.execute(f'PRAGMA journal_mode={journal_mode}')
+        synchronous = 'NORMAL' if journal_mode.upper() == 'WAL' else 'FULL'
+        self.conn.execute(f'PRAGMA synchronous={synchronous}')
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+
+    @property
+    def generation(self) -> int:
+        row = self.conn.execute("SELECT value FROM queue_meta WHERE key = 'generation'").fetchone()
+        return int(row['value']) if row else 1
+
+    def start_generation(self) -> int:
+        """Inicia uma nova coleta na fila, descartando as tarefas das gerações anteriores"""
+        self._transaction()
+        try:
+            generation = self.generation + 1
+            self.conn.execute(
+                "INSERT OR REPLACE INTO queue_meta (key, value) VALUES ('generation', ?)", (str(generation),)
+            )
+            self.conn.execute("DELETE FROM tasks WHERE generation < ?", (generation,))
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return generation
+
+    def enqueue(self, kind: str, payload: Dict, dedupe_key: Optional[str] = None,
+                max_attempts: int = 3, generation: Optional[int] = None) -> Optional[int]:
+        """Adiciona uma tarefa; retorna None se a dedupe_key já existir na geração"""
+        now = time.time()
+        generation = generation or self.generation
+        if dedupe_key is not None:
+            dedupe_key = f"{generation}:{dedupe_key}"
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO tasks (kind, generation, dedupe_key, payload, max_attempts, "
+            "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (kind, generation, dedupe_key, json.dumps(payload, ensure_ascii=False), max_attempts, now, now)
+        )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def lease(self, worker_id: str, lease_seconds: float = 120.0) -> Optional[Dict]:
+        """Arrenda a próxima tarefa disponível (pendente ou com lease vencido)"""
+        now = time.time()
+        self._transaction()
+        try:
+            generation = self.generation
+            # Leases vencidos sem tentativas restantes viram falha
+            self.conn.execute(
+                "UPDATE tasks SET status = ?, error = COALESCE(error, 'lease expirado'), updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (STATUS_FAILED, now, STATUS_LEASED, now)
+            )
+            row = self.conn.execute(
+                "SELECT * FROM tasks WHERE generation = ? AND ((status = ? AND available_at <= ?) "
+                "OR (status = ? AND lease_expires < ?)) ORDER BY id LIMIT 1",
+                (generation, STATUS_PENDING, now, STATUS_LEASED, now)
+            ).fetchone()
+            if row is None:
+                self.conn.execute('COMMIT')
+                return None
+            self.conn.execute(
+                "UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (STATUS_LEASED, worker_id, now + lease_seconds, now, row['id'])
+            )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+        task = dict(row)
+        task['payload'] = json.loads(task['payload'])
+        task['attempts'] += 1
+        return task
+
+    def extend(self, task_id: int, worker_id: str, lease_seconds: float = 120.0) -> bool:
+        """Renova o lease de uma tarefa longa (ex.: download grande)"""
+        cursor = self.conn.execute(
+            "UPDATE tasks SET lease_expires = ?, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = ?",
+            (time.time() + lease_seconds, time.time(), task_id, worker_id, STATUS_LEASED)
+        )
+        return cursor.rowcount == 1
+
+    def ack(self, task_id: int, worker_id: str, result=None) -> bool:
+        """Confirma a tarefa; falso se o lease já tiver sido perdido"""
+        cursor = self.conn.execute(
+            "UPDATE tasks SET status = ?, result = ?, error = NULL, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = ?",
+            (STATUS_DONE, json.dumps(result, ensure_ascii=False) if result is not None else None,
+             time.time(), task_id, worker_id, STATUS_LEASED)
+        )
+        return cursor.rowcount == 1
+
+    def release(self, task_id: int, worker_id: str, delay: float = 0.0) -> bool:
+        """Devolve a tarefa sem contar a tentativa (ela nem chegou a ser executada)"""
+        now = time.time()
+        cursor = self.conn.execute(
+            "UPDATE tasks SET status = ?, attempts = MAX(attempts - 1, 0), available_at = ?, "
+            "lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = ?",
+            (STATUS_PENDING, now + delay, now, task_id, worker_id, STATUS_LEASED)
+        )
+        return cursor.rowcount == 1
+
+    def nack(self, task_id: int, worker_id: str, error: str, retry_delay: float = None):
+        """Devolve a tarefa para nova tentativa (com backoff) ou marca como falha"""
+        now = time.time()
+        self._transaction()
+        try:
+            row = self.conn.execute(
+                "SELECT attempts, max_attempts FROM tasks WHERE id = ? AND lease_owner = ? AND status = ?",
+                (task_id, worker_id, STATUS_LEASED)
+            ).fetchone()
+            if row is not None:
+                exhausted = row['attempts'] >= row['max_attempts']
+                delay = retry_delay if retry_delay is not None else 2 ** row['attempts']
+                self.conn.execute(
+                    "UPDATE tasks SET status = ?, error = ?, available_at = ?, lease_owner = NULL, "
+                    "lease_expires = NULL, updated_at = ? WHERE id = ?",
+                    (STATUS_FAILED if exhausted else STATUS_PENDING, error, now + delay, now, task_id)
+                )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def retry_failed(self) -> int:
+        """Recoloca as tarefas que falharam na fila"""
+        cursor = self.conn.execute(
+            "UPDATE tasks SET status = ?, attempts = 0, available_at = 0, updated_at = ? "
+            "WHERE generation = ? AND status = ?",
+            (STATUS_PENDING, time.time(), self.generation, STATUS_FAILED)
+        )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        rows = self.conn.execute(
+            "SELECT status, COUNT(*) AS n FROM tasks WHERE generation = ? GROUP BY status", (self.generation,)
+        ).fetchall()
+        counts = {STATUS_PENDING: 0, STATUS_LEASED: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        counts.update({row['status']: row['n'] for row in rows})
+        return counts
+
+    def is_drained(self) -> bool:
+        """Nenhuma tarefa pendente ou em execução"""
+        counts = self.counts()
+        return counts[STATUS_PENDING] == 0 and counts[STATUS_LEASED] == 0
+
+    def done_tasks(self, kinds: List[str]) -> List[Dict]:
+        """Tarefas concluídas dos tipos informados, com payload e resultado"""
+        placeholders = ','.join('?' * len(kinds))
+        rows = self.conn.execute(
+            f"SELECT id, kind, payload, result FROM tasks WHERE generation = ? AND status = ? "
+            f"AND kind IN ({placeholders}) ORDER BY id",
+            (self.generation, STATUS_DONE, *kinds)
+        ).fetchall()
+        return [
+            {'id': row['id'], 'kind': row['kind'], 'payload': json.loads(row['payload']),
+             'result': json.loads(row['result']) if row['result'] else None}
+            for row in rows
+        ]
+
+    def failed_tasks(self) -> List[Dict]:
+        rows = self.conn.execute(
+            "SELECT id, kind, payload, attempts, error FROM tasks WHERE generation = ? AND status = ? "
+            "ORDER BY id",
+            (self.generation, STATUS_FAILED)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def page_task_key(payload: Dict) -> str:
+    folder = payload.get('folder') or {}
+    return f"{TASK_PAGE}:{payload['collection']}:{folder.get('id', '')}:{payload['page']}"
+
+
+def seed_collection_tasks(queue: WorkQueue, collector, collect_options: Dict[str, bool],
+                          page_sizes: Dict[str, int], download_files: bool = False) -> int:
+    """
+    Enfileira a primeira página de cada coleção selecionada.
+
+    Com a geração atual ainda em andamento, retoma a mesma coleta (as chaves
+    de deduplicação evitam tarefas repetidas); sobre uma fila esgotada,
+    inicia uma nova geração em vez de reaproveitar os resultados antigos.
+    """
+    counts = queue.counts()
+    if queue.is_drained() and (counts[STATUS_DONE] or counts[STATUS_FAILED]):
+        generation = queue.start_generation()
+        logging.getLogger(__name__).warning(
+            f"♻️ Fila {queue.path} já concluída ({counts[STATUS_DONE]} tarefas, {counts[STATUS_FAILED]} "
+            f"com falha) - iniciando nova coleta (geração {generation})"
+        )
+
+    seeded = 0
+    for collection, selected in collect_options.items():
+        if not selected or collection == 'documents':
+            continue
+        payload = {
+            'collection': collection,
+            'endpoint': collector.collection_endpoint(collection),
+            'page': 1,
+            'page_size': page_sizes.get(collection, 20),
+            'expand_documents': collection == 'document_folders' and collect_options.get('documents', False),
+            'download_files': download_files
+        }
+        if queue.enqueue(TASK_PAGE, payload, dedupe_key=page_task_key(payload)):
+            seeded += 1
+
+    # Documentos dependem da listagem de pastas
+    if collect_options.get('documents') and not collect_options.get('document_folders'):
+        payload = {
+            'collection': 'document_folders',
+            'endpoint': collector.collection_endpoint('document_folders'),
+            'page': 1,
+            'page_size': page_sizes.get('document_folders', 20),
+            'expand_documents': True,
+            'download_files': download_files
+        }
+        if queue.enqueue(TASK_PAGE, payload, dedupe_key=page_task_key(payload)):
+            seeded += 1
+    return seeded
+
+
+class CrawlWorker:
+    """Executa tarefas da fila usando um LiferayAPICollector próprio do processo"""
+
+    def __init__(self, queue: WorkQueue, collector, worker_id: str = None,
+                 lease_seconds: float = 120.0, poll_interval: float = 2.0,
+                 page_sizes: Dict[str, int] = None):
+        self.queue = queue
+        self.collector = collector
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.page_sizes = page_sizes or {}
+        self.logger = logging.getLogger(__name__)
+        self.completed = 0
+
+    def run(self, max_tasks: Optional[int] = None) -> int:
+        """Consome tarefas até a fila esvaziar (ou até max_tasks)"""
+        self.logger.info(f"👷 Worker {self.worker_id} iniciado")
+        while max_tasks is None or self.completed < max_tasks:
+            task = self.queue.lease(self.worker_id, self.lease_seconds)
+            if task is None:
+                if self.queue.is_drained():
+                    break
+                time.sleep(self.poll_interval)
+                continue
+
+            try:
+                result = self.execute(task)
+            except CircuitOpenError as e:
+                # Nada foi à rede: devolver a tarefa sem gastar tentativa
+                self.queue.release(task['id'], self.worker_id, delay=e.retry_after)
+                if e.budget_exhausted:
+                    self.logger.error(f"💥 Worker {self.worker_id}: orçamento de falhas esgotado - "
+                                      f"parando para não consumir as tarefas restantes")
+                    break
+                self.logger.info(f"🔌 Tarefa {task['id']} adiada {e.retry_after:.0f}s (circuito aberto)")
+                continue
+            except Exception as e:
+                self.logger.warning(f"❌ Tarefa {task['id']} ({task['kind']}) falhou "
+                                    f"na tentativa {task['attempts']}: {e}")
+                self.queue.nack(task['id'], self.worker_id, str(e))
+                continue
+
+            if self.queue.ack(task['id'], self.worker_id, result):
+                self.completed += 1
+            else:
+                self.logger.warning(f"⚠️ Lease da tarefa {task['id']} expirou antes da confirmação")
+
+        self.logger.info(f"🏁 Worker {self.worker_id} finalizado: {self.completed} tarefas")
+        return self.completed
+
+    def execute(self, task: Dict):
+        if task['kind'] in (TASK_PAGE, TASK_FOLDER):
+            return self._execute_page(task)
+        if task['kind'] == TASK_DOWNLOAD:
+            return {'path': self.collector.download_document(task['payload']['document'],
+                                                             on_progress=self._lease_renewer(task))}
+        raise ValueError(f"Tipo de tarefa desconhecido: {task['kind']}")
+
+    def _lease_renewer(self, task: Dict):
+        """Callback que renova o lease durante tarefas longas (a cada 1/3 do lease)"""
+        renewed_at = time.monotonic()
+
+        def renew():
+            nonlocal renewed_at
+            if time.monotonic() - renewed_at >= self.lease_seconds / 3:
+                if not self.queue.extend(task['id'], self.worker_id, self.lease_seconds):
+                    raise RuntimeError(f"Lease da tarefa {task['id']} perdido durante a execução")
+                renewed_at = time.monotonic()
+
+        return renew
+
+    def _execute_page(self, task: Dict) -> List[Dict]:
+        payload, generation = task['payload'], task['generation']
+        data = self.collector.fetch_page(payload['endpoint'], payload['page'], payload['page_size'])
+        if not data and self.collector.last_request_rejected:
+            breakers = self.collector.circuit_breakers
+            raise CircuitOpenError(
+                f"Circuito aberto para {payload['endpoint']}",
+                retry_after=max(breakers.retry_after(self.collector.base_url + payload['endpoint']), 1.0),
+                budget_exhausted=breakers.budget_exhausted
+            )
+        if not data:
+            raise RuntimeError(f"Falha ao obter {payload['endpoint']} página {payload['page']}")
+
+        # Primeira página - enfileirar as demais
+        if payload['page'] == 1:
+            for page in range(2, data.get('lastPage', 1) + 1):
+                follow_up = dict(payload, page=page)
+                self.queue.enqueue(TASK_PAGE, follow_up, dedupe_key=page_task_key(follow_up),
+                                   generation=generation)
+
+        items = data.get('items', [])
+        self.collector.page_sampler.record_page(payload['endpoint'], payload['page'], data.get('lastPage'),
+                                                len(items), latency=self.collector.last_request_latency)
+
+        if payload['collection'] == 'document_folders' and payload.get('expand_documents'):
+            for folder in items:
+                folder_payload = {
+                    'collection': 'documents',
+                    'endpoint': self.collector.collection_endpoint('documents', folder.get('id')),
+                    'page': 1,
+                    'page_size': self.page_sizes.get('documents', 20),
+                    'folder': {'id': folder.get('id'), 'name': folder.get('name', f"Pasta_{folder.get('id')}")},
+                    'download_files': payload.get('download_files', False)
+                }
+                self.queue.enqueue(TASK_FOLDER, folder_payload, dedupe_key=page_task_key(folder_payload),
+                                   generation=generation)
+
+        if payload['collection'] == 'documents' and payload.get('download_files'):
+            for document in items:
+                self.queue.enqueue(TASK_DOWNLOAD, {'document': document},
+                                   dedupe_key=f"{TASK_DOWNLOAD}:{document.get('id')}", generation=generation)
+
+        return items
+
+
+def assemble_outputs(queue: WorkQueue, collector) -> Dict[str, int]:
+    """
+    Monta os arquivos de saída a partir das páginas concluídas na fila.
+
+    Mantém a mesma ordem e formato da coleta sequencial: páginas em ordem,
+    documentos agrupados por pasta na ordem de document_folders.
+    """
+    by_collection: Dict[str, List[Dict]] = {}
+    for task in queue.done_tasks([TASK_PAGE, TASK_FOLDER]):
+        by_collection.setdefault(task['payload']['collection'], []).append(task)
+
+    for collection in ('structured_contents', 'content_folders', 'site_pages', 'document_folders'):
+        tasks = sorted(by_collection.get(collection, []), key=lambda t: t['payload']['page'])
+        records = [item for task in tasks for item in task['result'] or []]
+        collector.data_profile.observe_records(collection, records)
+        collector.store_collection(collection, records)
+
+    document_tasks = by_collection.get('documents', [])
+    if document_tasks:
+        folder_order = {
+            item.get('id'): position
+            for position, item in enumerate(
+                item for task in sorted(by_collection.get('document_folders', []),
+                                        key=lambda t: t['payload']['page'])
+                for item in task['result'] or []
+            )
+        }
+        folders: Dict = {}
+        for task in document_tasks:
+            folder = task['payload']['folder']
+            folders.setdefault(folder['id'], (folder, []))[1].append(task)
+
+        all_documents = []
+        for folder_id in sorted(folders, key=lambda f: folder_order.get(f, len(folder_order))):
+            folder, tasks = folders[folder_id]
+            documents = [item for task in sorted(tasks, key=lambda t: t['payload']['page'])
+                         for item in task['result'] or []]
+            collector.data_profile.observe_records('documents', documents)
+            collector.save_folder_documents(folder, documents)
+            all_documents.extend(documents)
+        collector.store_documents(all_documents)
+
+    collector.stats['errors'] += len(queue.failed_tasks())
+    return {key: value for key, value in collector.stats.items() if key != 'start_time'}